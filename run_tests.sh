@@ -15,6 +15,13 @@ print_message () {
 }
 
 
+# Параллельный режим: те же проверки, а тесты обоих проектов
+# выполняются одновременно, по шардам, см. run_tests_parallel.py.
+if [[ "$1" == "--parallel" ]]; then
+    exec python run_tests_parallel.py "${@:2}"
+fi
+
+
 if python -m flake8 --config=setup.cfg 1>&2;
 then
     print_message " flake8 завершил проверку кода, ошибок не обнаружено " "="
@@ -0,0 +1,186 @@
+"""
+Параллельный прогон тестов обоих проектов.
+
+Сначала, как и в run_tests.sh, проверяются flake8 и structure_test.py.
+Затем для каждого проекта один раз создаётся мигрированный шаблон
+тестовой базы SQLite. Тесты делятся на шарды по модулям и классам,
+и шарды обоих проектов выполняются одновременно, не больше --workers
+процессов сразу. Каждый процесс получает свою копию шаблона и запускает
+pytest с --reuse-db, поэтому миграции повторно не выполняются.
+
+В конце печатается время прогона. С --serial перед ним замеряется
+настоящий последовательный прогон, как в run_tests.sh, и печатается
+ускорение относительно него.
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from time import perf_counter
+
+BASE_DIR = Path(__file__).resolve().parent
+
+Project = namedtuple('Project', ('name', 'settings', 'test_db_env'))
+Shard = namedtuple('Shard', ('project', 'number', 'node_ids'))
+Result = namedtuple('Result', ('shard', 'returncode', 'seconds', 'output'))
+
+PROJECTS = (
+    Project('ya_news', 'yanews.settings', 'YANEWS_TEST_DB'),
+    Project('ya_note', 'yanote.settings', 'YANOTE_TEST_DB'),
+)
+# Та же подготовка базы, что у pytest-django, но без удаления в конце.
+CREATE_TEMPLATE = (
+    'import django; django.setup(); '
+    'from django.db import connection; '
+    'connection.creation.create_test_db(verbosity=0, autoclobber=True, '
+    'serialize=False)'
+)
+
+
+def project_env(project, test_db=None):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=project.settings)
+    env.pop(project.test_db_env, None)
+    if test_db is not None:
+        env[project.test_db_env] = str(test_db)
+    return env
+
+
+def run(project, args, test_db=None):
+    """Запускает python с args в каталоге проекта."""
+    return subprocess.run(
+        [sys.executable, *args], cwd=BASE_DIR / project.name,
+        env=project_env(project, test_db),
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+
+
+def create_template(project, directory):
+    path = directory / f'{project.name}-template.sqlite3'
+    completed = run(project, ['-c', CREATE_TEMPLATE], test_db=path)
+    if completed.returncode:
+        sys.exit(f'Не удалось создать шаблон базы {project.name}:\n'
+                 f'{completed.stdout}')
+    return path
+
+
+def copy_database(source, target):
+    """Копия через backup API: шаблон может быть в режиме WAL."""
+    with closing(sqlite3.connect(source)) as src, \
+            closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+
+
+def collect(project):
+    completed = run(project, ['-m', 'pytest', '--collect-only', '-qqq'])
+    if completed.returncode:
+        sys.exit(f'Не удалось собрать тесты {project.name}:\n'
+                 f'{completed.stdout}')
+    return [line for line in completed.stdout.splitlines() if '::' in line]
+
+
+def split(project, node_ids, count):
+    """
+    Делит тесты на шарды.
+
+    Тесты одного модуля или класса остаются вместе, чтобы их фикстуры
+    уровня модуля и setUpTestData создавались один раз. Группы
+    раскладываются от больших к меньшим в наименее загруженный шард.
+    """
+    groups = defaultdict(list)
+    for node_id in node_ids:
+        groups[node_id.split('[')[0].rsplit('::', 1)[0]].append(node_id)
+    shards = [[] for _ in range(min(count, len(groups)))]
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(group)
+    return [
+        Shard(project, number, node_ids)
+        for number, node_ids in enumerate(shards, start=1)
+    ]
+
+
+def run_shard(shard, template, directory):
+    database = directory / f'{shard.project.name}-{shard.number}.sqlite3'
+    copy_database(template, database)
+    started = perf_counter()
+    completed = run(
+        shard.project,
+        ['-m', 'pytest', '--reuse-db', '-q', '--tb=short', *shard.node_ids],
+        test_db=database,
+    )
+    return Result(
+        shard, completed.returncode, perf_counter() - started,
+        completed.stdout,
+    )
+
+
+def run_serial():
+    """Время прогона обоих проектов по очереди, как в run_tests.sh."""
+    started = perf_counter()
+    for project in PROJECTS:
+        completed = run(project, ['-m', 'pytest', '-q'])
+        if completed.returncode:
+            sys.exit(f'Последовательный прогон {project.name} упал:\n'
+                     f'{completed.stdout}')
+    return perf_counter() - started
+
+
+def check_code():
+    for args, message in (
+        (['-m', 'flake8', '--config=setup.cfg'],
+         'flake8 обнаружил отклонения от стандартов'),
+        (['structure_test.py'], 'Тесты не найдены в ожидаемых каталогах'),
+    ):
+        if subprocess.run([sys.executable, *args], cwd=BASE_DIR).returncode:
+            sys.exit(message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Сколько процессов pytest выполнять сразу')
+    parser.add_argument('--serial', action='store_true',
+                        help='Замерить и последовательный прогон')
+    options = parser.parse_args()
+    check_code()
+    serial = run_serial() if options.serial else None
+    started = perf_counter()
+    with tempfile.TemporaryDirectory() as directory, \
+            ThreadPoolExecutor(max_workers=options.workers) as pool:
+        directory = Path(directory)
+        templates = dict(zip(PROJECTS, pool.map(
+            lambda project: create_template(project, directory), PROJECTS
+        )))
+        shards = [
+            shard
+            for project, node_ids in zip(PROJECTS, pool.map(collect, PROJECTS))
+            for shard in split(project, node_ids, options.workers)
+        ]
+        results = list(pool.map(
+            lambda shard: run_shard(
+                shard, templates[shard.project], directory
+            ),
+            shards,
+        ))
+    wall = perf_counter() - started
+    for result in results:
+        summary = result.output.strip().splitlines()[-1:]
+        print(f'{result.shard.project.name} #{result.shard.number}: '
+              f'{len(result.shard.node_ids)} тестов, '
+              f'{result.seconds:.1f} с — {"".join(summary)}')
+        if result.returncode:
+            print(result.output)
+    print(f'Параллельно: {wall:.1f} с, процессов: {options.workers}')
+    if serial is not None:
+        print(f'Последовательно: {serial:.1f} с, '
+              f'ускорение {serial / wall:.2f}×')
+    sys.exit(max(result.returncode for result in results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Очередь комментариев с отложенной записью.
+
+Когда задан NEWS_COMMENT_QUEUE, проверенный формой комментарий не пишется
+в базу в запросе, а добавляется в журнал — отдельный файл SQLite.
+Команда drain_comments забирает записи пачками: берёт их в аренду,
+создаёт комментарии одним bulk_create, обновляет счётчики новостей
+и только после фиксации транзакции удаляет записи из журнала.
+Если обработчик упал до удаления, аренда истекает и записи выдаются
+снова, поэтому доставка — «хотя бы один раз».
+"""
+import sqlite3
+from collections import Counter, namedtuple
+from contextlib import closing
+from functools import lru_cache
+from time import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import Comment, News
+from .moderation import check_deferred
+from .page_cache import invalidate_news
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS entries (
+        id INTEGER PRIMARY KEY,
+        news_id INTEGER NOT NULL,
+        author_id INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        leased_until REAL NOT NULL DEFAULT 0
+    )
+"""
+
+QueuedComment = namedtuple(
+    'QueuedComment', ('id', 'news_id', 'author_id', 'text')
+)
+QueueDepth = namedtuple('QueueDepth', ('pending', 'leased'))
+
+
+class CommentQueue:
+    """Журнал комментариев в файле SQLite."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        with self.connect() as connection:
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute(SCHEMA_SQL)
+
+    def connect(self):
+        """Соединение на одну операцию: журнал пишут из разных потоков."""
+        return closing(sqlite3.connect(
+            self.path, timeout=30, isolation_level=None
+        ))
+
+    def put(self, news_id, author_id, text):
+        with self.connect() as connection:
+            connection.execute(
+                'INSERT INTO entries (news_id, author_id, text) '
+                'VALUES (?, ?, ?)',
+                (news_id, author_id, text),
+            )
+
+    def lease(self, limit, seconds):
+        """Выдаёт до limit свободных записей и закрепляет их на seconds."""
+        now = time()
+        with self.connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            rows = connection.execute(
+                'SELECT id, news_id, author_id, text FROM entries '
+                'WHERE leased_until < ? ORDER BY id LIMIT ?',
+                (now, limit),
+            ).fetchall()
+            connection.executemany(
+                'UPDATE entries SET leased_until = ? WHERE id = ?',
+                [(now + seconds, row[0]) for row in rows],
+            )
+            connection.execute('COMMIT')
+        return [QueuedComment(*row) for row in rows]
+
+    def ack(self, ids):
+        """Удаляет обработанные записи."""
+        with self.connect() as connection:
+            connection.executemany(
+                'DELETE FROM entries WHERE id = ?', [(pk,) for pk in ids]
+            )
+
+    def depth(self):
+        """Сколько записей ждёт обработки и сколько уже в аренде."""
+        now = time()
+        with self.connect() as connection:
+            return QueueDepth(*connection.execute(
+                'SELECT COALESCE(SUM(leased_until < ?), 0), '
+                'COALESCE(SUM(leased_until >= ?), 0) FROM entries',
+                (now, now),
+            ).fetchone())
+
+
+@lru_cache(maxsize=None)
+def _open_queue(path):
+    return CommentQueue(path)
+
+
+def get_queue():
+    """Очередь из настроек или None, если комментарии пишутся сразу."""
+    if not settings.NEWS_COMMENT_QUEUE:
+        return None
+    return _open_queue(str(settings.NEWS_COMMENT_QUEUE))
+
+
+def drain(queue, batch_size, lease_seconds):
+    """
+    Переносит одну пачку из журнала в базу, возвращает её размер.
+
+    Записи к удалённым за это время новостям или авторам и отклонённые
+    модерацией отбрасываются.
+    """
+    entries = queue.lease(batch_size, lease_seconds)
+    if not entries:
+        return 0
+    news_ids = set(News.objects.filter(
+        pk__in={entry.news_id for entry in entries}
+    ).values_list('pk', flat=True))
+    author_ids = set(get_user_model().objects.filter(
+        pk__in={entry.author_id for entry in entries}
+    ).values_list('pk', flat=True))
+    # Разбор очереди и так идёт вне запроса, поэтому медленные стадии
+    # модерации выполняются здесь, до вставки.
+    accepted = [
+        entry for entry in entries
+        if entry.news_id in news_ids and entry.author_id in author_ids
+        and check_deferred(entry.text).allowed
+    ]
+    counts = Counter(entry.news_id for entry in accepted)
+    with transaction.atomic():
+        Comment.objects.bulk_create(
+            Comment(
+                news_id=entry.news_id,
+                author_id=entry.author_id,
+                text=entry.text,
+            )
+            for entry in accepted
+        )
+        for news_id, count in counts.items():
+            News.objects.filter(pk=news_id).add_comments(count)
+    queue.ack([entry.id for entry in entries])
+    for news_id in counts:
+        invalidate_news(news_id)
+    return len(entries)
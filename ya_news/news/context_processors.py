@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """Время жизни закэшированных фрагментов шаблонов."""
+    return {'fragment_cache_timeout': settings.NEWS_FRAGMENT_CACHE_TIMEOUT}
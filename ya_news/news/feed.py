@@ -0,0 +1,69 @@
+"""
+Готовая лента главной страницы.
+
+В общем для всех процессов кэше NEWS_FEED_CACHE_ALIAS лежит
+упорядоченный список id последних новостей. Его пересобирает
+сохранение или удаление новости после фиксации транзакции в любом
+процессе, поэтому главная читает новости по первичному ключу
+и не сортирует всю таблицу. Если список пропал или ссылается на
+удалённые строки, он собирается заново обычным запросом.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, IntegerField, When
+
+from .models import News
+
+FEED_KEY = 'news:feed'
+FEED_ORDERING = ('-date', '-pk')
+
+
+def feed_cache():
+    return caches[settings.NEWS_FEED_CACHE_ALIAS]
+
+
+def compute_feed():
+    """Последние новости прямым запросом, без кэша."""
+    return News.objects.order_by(
+        *FEED_ORDERING
+    )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+
+def store_feed(news):
+    feed_cache().set(
+        FEED_KEY, [item.pk for item in news], settings.NEWS_FEED_TIMEOUT
+    )
+
+
+def latest_news():
+    """Новости для главной: по id из ленты, а без неё — сортировкой."""
+    ids = feed_cache().get(FEED_KEY)
+    if ids:
+        # Порядок берётся из ленты: сортировка по позиции в списке
+        # не даёт планировщику обходить индекс даты вместо поиска по id.
+        position = Case(
+            *(When(pk=pk, then=index) for index, pk in enumerate(ids)),
+            output_field=IntegerField(),
+        )
+        news = News.objects.filter(pk__in=ids).order_by(position)
+        if len(news) == len(ids):
+            return news
+    news = compute_feed()
+    store_feed(news)
+    return news
+
+
+def rebuild_feed():
+    store_feed(compute_feed())
+
+
+def refresh_feed():
+    """
+    Сбрасывает ленту сразу и собирает её заново после фиксации.
+
+    Читатель, который успеет собрать ленту до фиксации по старым
+    данным, будет перезаписан пересборкой из on_commit.
+    """
+    feed_cache().delete(FEED_KEY)
+    transaction.on_commit(rebuild_feed)
@@ -1,14 +1,10 @@
 from django.core.exceptions import ValidationError
-from django.forms import ModelForm
+from django.forms import CharField, DateField, DateInput, Form, ModelForm
 
 from .models import Comment
-
-BAD_WORDS = (
-    'редиска',
-    'негодяй',
-    # Дополните список на своё усмотрение.
-)
-WARNING = 'Не ругайтесь!'
+from .moderation import precheck
+# Словарь живёт в profanity; здесь его по-прежнему ищут тесты.
+from .profanity import BAD_WORDS, WARNING  # noqa: F401
 
 
 class CommentForm(ModelForm):
@@ -18,10 +14,24 @@ class CommentForm(ModelForm):
         fields = ('text',)
 
     def clean_text(self):
-        """Не позволяем ругаться в комментариях."""
+        """
+        Не позволяем ругаться и рассылать спам в комментариях.
+
+        Здесь работают только быстрые стадии модерации, остальные
+        проверяют комментарий после сохранения.
+        """
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        verdict = precheck(text)
+        if not verdict.allowed:
+            raise ValidationError(verdict.reason)
         return text
+
+
+class NewsSearchForm(Form):
+    q = CharField(label='Запрос', required=False)
+    date_from = DateField(
+        label='С', required=False, widget=DateInput(attrs={'type': 'date'})
+    )
+    date_to = DateField(
+        label='По', required=False, widget=DateInput(attrs={'type': 'date'})
+    )
@@ -0,0 +1,57 @@
+import random
+from timeit import timeit
+
+from django.core.management.base import BaseCommand
+
+from news.profanity import ProfanityMatcher
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def loop_search(words, text):
+    """Прежняя проверка: отдельный поиск подстроки для каждого слова."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает проверку комментария автоматом Ахо — Корасик '
+        'с перебором слов для словарей разного размера'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[10, 100, 1000, 10000]
+        )
+        parser.add_argument('--text-length', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        text = ' '.join(
+            ''.join(rng.choices(ALPHABET, k=rng.randint(2, 10)))
+            for _ in range(options['text_length'] // 6)
+        )
+        repeat = options['repeat']
+        self.stdout.write(
+            f'{"слов":>8} {"перебор, мкс":>14} {"автомат, мкс":>14}'
+            f' {"сборка, мс":>12}'
+        )
+        for size in options['sizes']:
+            words = [
+                ''.join(rng.choices(ALPHABET, k=rng.randint(5, 9)))
+                for _ in range(size)
+            ]
+            build = timeit(lambda: ProfanityMatcher(words), number=1)
+            matcher = ProfanityMatcher(words)
+            loop = timeit(lambda: loop_search(words, text), number=repeat)
+            automaton = timeit(lambda: matcher.search(text), number=repeat)
+            self.stdout.write(
+                f'{size:>8} {loop / repeat * 1e6:>14.1f}'
+                f' {automaton / repeat * 1e6:>14.1f} {build * 1e3:>12.1f}'
+            )
@@ -0,0 +1,52 @@
+import random
+from statistics import quantiles
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.search import search_news
+from news.seed import VOCABULARY, seed_news
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу новостями и комментариями и измеряет задержку '
+        'поиска. Все данные откатываются после замера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=200_000)
+        parser.add_argument('--comments', type=int, default=500_000)
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = perf_counter()
+            seed_news(options['news'], options['comments'], options['seed'])
+            self.stdout.write(
+                f'Наполнение: {perf_counter() - started:.1f} с'
+            )
+            timings = self.measure(options['queries'], options['seed'])
+            transaction.set_rollback(True)
+        percentiles = quantiles(timings, n=100)
+        self.stdout.write(
+            f'Запросов: {len(timings)}, '
+            f'p50: {percentiles[49]:.2f} мс, '
+            f'p95: {percentiles[94]:.2f} мс, '
+            f'p99: {percentiles[98]:.2f} мс'
+        )
+
+    def measure(self, queries, seed):
+        """Время получения первой страницы выдачи, в миллисекундах."""
+        rng = random.Random(seed)
+        timings = []
+        for _ in range(queries):
+            query = ' '.join(rng.sample(VOCABULARY, rng.randint(1, 2)))
+            started = perf_counter()
+            results = search_news(query)
+            results.count()
+            results[0:20]
+            timings.append((perf_counter() - started) * 1000)
+        return timings
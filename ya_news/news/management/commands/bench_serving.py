@@ -0,0 +1,265 @@
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+from http import HTTPStatus
+from pathlib import Path
+from statistics import quantiles
+from time import perf_counter, sleep
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (ThreadedWSGIServer,
+                                          WSGIRequestHandler,
+                                          get_internal_wsgi_application)
+from django.db import connections
+
+from news.seed import seed_news
+
+HOST = '127.0.0.1'
+SERVERS = ('wsgi', 'asgi')
+DETAIL_PAGES = 200
+STARTUP_TIMEOUT = 15
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Обработчик без записи каждого запроса в лог."""
+
+    def log_message(self, *args):
+        pass
+
+
+class BenchWSGIServer(ThreadedWSGIServer):
+    """Сервер с потоком на запрос и длинной очередью соединений."""
+    request_queue_size = 1024
+
+
+def use_database(path):
+    """Переключает соединение default на файл базы для замера."""
+    connections.close_all()
+    connections['default'].settings_dict['NAME'] = path
+
+
+def serve_wsgi(port):
+    server = BenchWSGIServer((HOST, port), QuietRequestHandler)
+    server.set_app(get_internal_wsgi_application())
+    server.serve_forever()
+
+
+def serve_asgi(port):
+    """ASGI через uvicorn, а без него — через простой сервер на asyncio."""
+    application = get_asgi_application()
+    try:
+        import uvicorn
+    except ImportError:
+        asyncio.run(serve_asgi_minimal(application, port))
+    else:
+        uvicorn.run(
+            application, host=HOST, port=port,
+            lifespan='off', log_level='warning', access_log=False,
+        )
+
+
+async def serve_asgi_minimal(application, port):
+    """
+    HTTP/1.1 без keep-alive поверх asyncio.start_server.
+
+    Заменяет uvicorn там, где его нет: разбирает строку запроса
+    и заголовки, вызывает приложение и закрывает соединение.
+    """
+    async def handle(reader, writer):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        request_line, *header_lines = head.decode('latin-1').split('\r\n')
+        method, target, _ = request_line.split(' ', 2)
+        path, _, query = target.partition('?')
+        headers = []
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            if name:
+                headers.append((
+                    name.strip().lower().encode('latin-1'),
+                    value.strip().encode('latin-1'),
+                ))
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': unquote(path),
+            'raw_path': path.encode('latin-1'),
+            'query_string': query.encode('latin-1'),
+            'root_path': '',
+            'headers': headers,
+            'client': writer.get_extra_info('peername')[:2],
+            'server': (HOST, port),
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status = HTTPStatus(message['status'])
+                writer.write(
+                    f'HTTP/1.1 {status.value} {status.phrase}\r\n'.encode()
+                    + b''.join(
+                        name + b': ' + value + b'\r\n'
+                        for name, value in message.get('headers', [])
+                    )
+                    + b'Connection: close\r\n\r\n'
+                )
+            elif message['type'] == 'http.response.body':
+                writer.write(message.get('body', b''))
+
+        await application(scope, receive, send)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, HOST, port, backlog=1024)
+    async with server:
+        await server.serve_forever()
+
+
+async def fetch(port, path):
+    """Один GET на новом соединении, возвращает код ответа."""
+    reader, writer = await asyncio.open_connection(HOST, port)
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: {HOST}:{port}\r\n'
+        f'Connection: close\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return int(data.split(b' ', 2)[1])
+
+
+async def run_load(port, paths, requests, concurrency):
+    """Задержки в миллисекундах, число ошибок и общее время прогона."""
+    timings, errors = [], 0
+    indexes = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for index in indexes:
+            started = perf_counter()
+            try:
+                status = await fetch(port, paths[index % len(paths)])
+            except (OSError, IndexError, ValueError):
+                status = None
+            timings.append((perf_counter() - started) * 1000)
+            if status != HTTPStatus.OK:
+                errors += 1
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return timings, errors, perf_counter() - started
+
+
+def wait_for_port(port, process):
+    deadline = perf_counter() + STARTUP_TIMEOUT
+    while perf_counter() < deadline:
+        if process.poll() is not None:
+            raise CommandError('Сервер завершился при запуске')
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return
+        except OSError:
+            sleep(0.1)
+    raise CommandError('Сервер не начал принимать соединения')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает главную и страницы новостей под WSGI (поток на запрос) '
+        'и ASGI (uvicorn или простой сервер на asyncio): запросы в секунду '
+        'и p99 при разной конкурентности. Данные создаются во временной '
+        'базе, которая удаляется после замера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=10_000)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument(
+            '--concurrency', nargs='+', type=int, default=[10, 50, 200]
+        )
+        parser.add_argument(
+            '--servers', nargs='+', choices=SERVERS, default=list(SERVERS)
+        )
+        parser.add_argument(
+            '--page-cache', choices=settings.PAGE_CACHE_BACKENDS,
+            default='off',
+            help='Кэш страниц в серверах; по умолчанию отключён.',
+        )
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--seed', type=int, default=0)
+        # Служебные параметры: так команда запускает сервер в подпроцессе.
+        parser.add_argument('--serve', choices=SERVERS)
+        parser.add_argument('--database')
+
+    def handle(self, *args, **options):
+        if options['serve']:
+            use_database(options['database'])
+            serve = serve_wsgi if options['serve'] == 'wsgi' else serve_asgi
+            serve(options['port'])
+            return
+        with tempfile.TemporaryDirectory() as directory:
+            database = str(Path(directory) / 'bench.sqlite3')
+            paths = self.prepare(database, options)
+            self.stdout.write(
+                f'{"сервер":<6} {"клиентов":>8} {"запросов/с":>11}'
+                f' {"p50, мс":>9} {"p99, мс":>9} {"ошибок":>7}'
+            )
+            for server in options['servers']:
+                self.bench(server, database, paths, options)
+
+    def prepare(self, database, options):
+        """Временная база с данными и список адресов для нагрузки."""
+        use_database(database)
+        call_command('migrate', verbosity=0)
+        news_ids = seed_news(
+            options['news'], options['comments'], options['seed']
+        )
+        connections.close_all()
+        rng = random.Random(options['seed'])
+        sample = rng.sample(news_ids, min(DETAIL_PAGES, len(news_ids)))
+        return ['/'] + [f'/news/{news_id}/' for news_id in sample]
+
+    def bench(self, server, database, paths, options):
+        port = options['port']
+        process = subprocess.Popen(
+            [
+                sys.executable, str(settings.BASE_DIR / 'manage.py'),
+                'bench_serving', '--serve', server,
+                '--port', str(port), '--database', database,
+            ],
+            env={**os.environ, 'YANEWS_PAGE_CACHE': options['page_cache']},
+        )
+        try:
+            wait_for_port(port, process)
+            asyncio.run(run_load(port, paths, len(paths), 10))
+            for concurrency in options['concurrency']:
+                timings, errors, elapsed = asyncio.run(run_load(
+                    port, paths, options['requests'], concurrency
+                ))
+                percentiles = quantiles(timings, n=100)
+                self.stdout.write(
+                    f'{server:<6} {concurrency:>8}'
+                    f' {len(timings) / elapsed:>11.0f}'
+                    f' {percentiles[49]:>9.1f} {percentiles[98]:>9.1f}'
+                    f' {errors:>7}'
+                )
+        finally:
+            process.terminate()
+            process.wait()
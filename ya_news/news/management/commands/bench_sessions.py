@@ -0,0 +1,85 @@
+import tempfile
+from pathlib import Path
+from statistics import quantiles
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, reset_queries
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.seed import seed_authors, seed_news
+from yacommon.benchmarks import make_client
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет страницу новости для авторизованного пользователя '
+        'с каждым хранилищем сессий из SESSION_ENGINES: запросов в '
+        'секунду, p50, p99 и обращения к django_session за один ответ. '
+        'Каждый режим получает свою временную базу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modes', nargs='+', choices=settings.SESSION_ENGINES,
+            default=list(settings.SESSION_ENGINES),
+        )
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=50)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"режим":<15} {"запросов/с":>10} {"p50, мс":>8}'
+            f' {"p99, мс":>8} {"чтений":>7} {"записей":>8}'
+        )
+        database = connections['default'].settings_dict['NAME']
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                for mode in options['modes']:
+                    connections.close_all()
+                    connections['default'].settings_dict['NAME'] = str(
+                        Path(directory) / f'{mode}.sqlite3'
+                    )
+                    with override_settings(
+                        SESSION_ENGINE=settings.SESSION_ENGINES[mode]
+                    ):
+                        self.bench(mode, options)
+            finally:
+                connections.close_all()
+                connections['default'].settings_dict['NAME'] = database
+
+    def bench(self, mode, options):
+        for cache in caches.all():
+            cache.clear()
+        call_command('migrate', verbosity=0)
+        news_id, = seed_news(1, options['comments'])
+        author, = seed_authors(1)
+        client = make_client(author)
+        url = reverse('news:detail', args=(news_id,))
+        client.get(url)
+        reset_queries()
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        session_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'django_session' in query['sql']
+        ]
+        reads = sum(sql.startswith('SELECT') for sql in session_queries)
+        timings = []
+        started = perf_counter()
+        for _ in range(options['requests']):
+            request_started = perf_counter()
+            client.get(url)
+            timings.append((perf_counter() - request_started) * 1000)
+        elapsed = perf_counter() - started
+        percentiles = quantiles(timings, n=100)
+        self.stdout.write(
+            f'{mode:<15} {len(timings) / elapsed:>10.0f}'
+            f' {percentiles[49]:>8.2f} {percentiles[98]:>8.2f}'
+            f' {reads:>7} {len(session_queries) - reads:>8}'
+        )
@@ -0,0 +1,103 @@
+import tempfile
+import threading
+from pathlib import Path
+from statistics import quantiles
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+from news.models import Comment, News
+
+
+class Command(BaseCommand):
+    help = (
+        'Пишет комментарии из нескольких потоков так же, как view '
+        'публикации, и сравнивает профили базы из DATABASE_PROFILES: '
+        'записей в секунду, p99 и долю ошибок блокировки. Каждый профиль '
+        'получает свою временную базу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles', nargs='+', choices=settings.DATABASE_PROFILES,
+            default=list(settings.DATABASE_PROFILES),
+        )
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=200)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"профиль":<10} {"потоков":>7} {"записей/с":>10}'
+            f' {"p99, мс":>9} {"ошибок":>7} {"доля":>7}'
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in options['profiles']:
+                alias = f'bench_{profile}'
+                connections.settings[alias] = {
+                    **connections.settings['default'],
+                    **settings.DATABASE_PROFILES[profile],
+                    'NAME': str(Path(directory) / f'{profile}.sqlite3'),
+                }
+                try:
+                    self.bench(alias, profile, options)
+                finally:
+                    connections[alias].close()
+                    del connections.settings[alias]
+
+    def bench(self, alias, profile, options):
+        call_command('migrate', database=alias, verbosity=0)
+        author = get_user_model().objects.db_manager(alias).create(
+            username='bench-author'
+        )
+        news = News.objects.using(alias).create(
+            title='Новость', text='Текст', date=timezone.now().date()
+        )
+        timings, errors = [], []
+        lock = threading.Lock()
+
+        def writer():
+            own_timings, own_errors = [], 0
+            for _ in range(options['writes']):
+                started = perf_counter()
+                try:
+                    # Те же записи, что и в NewsComment.form_valid.
+                    with transaction.atomic(using=alias):
+                        Comment.objects.using(alias).create(
+                            news=news, author=author, text='Комментарий'
+                        )
+                        News.objects.using(alias).filter(
+                            pk=news.pk
+                        ).add_comments(1)
+                except OperationalError:
+                    own_errors += 1
+                else:
+                    own_timings.append((perf_counter() - started) * 1000)
+                # Конец запроса: соединение закрывается по CONN_MAX_AGE.
+                connections[alias].close_if_unusable_or_obsolete()
+            connections[alias].close()
+            with lock:
+                timings.extend(own_timings)
+                errors.append(own_errors)
+
+        threads = [
+            threading.Thread(target=writer)
+            for _ in range(options['threads'])
+        ]
+        started = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - started
+        total = options['threads'] * options['writes']
+        p99 = quantiles(timings, n=100)[98] if len(timings) > 1 else 0
+        self.stdout.write(
+            f'{profile:<10} {options["threads"]:>7}'
+            f' {len(timings) / elapsed:>10.0f} {p99:>9.1f}'
+            f' {sum(errors):>7} {sum(errors) / total:>7.1%}'
+        )
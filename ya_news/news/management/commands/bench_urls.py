@@ -0,0 +1,138 @@
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+
+from news import urls
+from news.models import Comment
+from news.seed import VOCABULARY, seed_news
+from yacommon.benchmarks import (Page, compare_results, make_client,
+                                 make_results, measure_page, read_results,
+                                 uncovered, write_results)
+
+SIZES = (1_000, 100_000, 1_000_000)
+COMMENTS_PER_NEWS = 5
+AUTHORS = 50
+
+
+def news_pages(news_id, comment_id):
+    """Замер для каждой страницы из news/urls.py."""
+    return {
+        'news:home': Page('get', reverse('news:home'), authorized=False),
+        'news:search': Page(
+            'get', reverse('news:search'), {'q': VOCABULARY[0]},
+            authorized=False,
+        ),
+        'news:detail': Page('get', reverse('news:detail', args=(news_id,))),
+        'news:comments': Page(
+            'get', reverse('news:comments', args=(news_id,)),
+            authorized=False,
+        ),
+        'news:edit': Page('get', reverse('news:edit', args=(comment_id,))),
+        'news:delete': Page(
+            'get', reverse('news:delete', args=(comment_id,))
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Для каждого размера из --sizes наполняет временную базу через '
+        'seed_news и замеряет каждую страницу news/urls.py: медиану и '
+        'p99 задержки, число запросов к базе и пик памяти. Результаты '
+        'пишутся в JSON, --compare сравнивает их с прошлым прогоном. '
+        'Кэш страниц выбирается как обычно, через YANEWS_PAGE_CACHE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                            help='Число новостей в базе')
+        parser.add_argument('--comments-per-news', type=int,
+                            default=COMMENTS_PER_NEWS)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='bench_urls.json')
+        parser.add_argument('--compare', help='JSON прошлого прогона')
+
+    def handle(self, *args, **options):
+        missing = uncovered(urls.urlpatterns, urls.app_name, news_pages(1, 1))
+        if missing:
+            raise CommandError(f'Нет замера для страниц: {", ".join(missing)}')
+        baseline = None
+        if options['compare']:
+            baseline = read_results(options['compare'])
+        database = connections['default'].settings_dict['NAME']
+        sizes = {}
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                for size in options['sizes']:
+                    sizes[str(size)] = self.bench(
+                        Path(directory) / f'{size}.sqlite3', size, options
+                    )
+            finally:
+                connections.close_all()
+                connections['default'].settings_dict['NAME'] = database
+        results = make_results('ya_news', sizes)
+        write_results(options['output'], results)
+        self.stdout.write(f'Результаты записаны в {options["output"]}')
+        if baseline is not None:
+            self.report_changes(baseline, results)
+
+    def bench(self, path, size, options):
+        connections.close_all()
+        connections['default'].settings_dict['NAME'] = str(path)
+        for cache in caches.all():
+            cache.clear()
+        call_command('migrate', verbosity=0)
+        started = perf_counter()
+        news_ids = seed_news(
+            size, size * options['comments_per_news'], options['seed'],
+            authors=AUTHORS,
+        )
+        self.stdout.write(
+            f'\nНовостей: {size}, наполнение {perf_counter() - started:.1f} с'
+        )
+        # Новость из середины ленты, у которой есть комментарии.
+        comment = Comment.objects.select_related('author').filter(
+            news_id__gte=news_ids[len(news_ids) // 2]
+        ).order_by('news_id', 'pk').first()
+        if comment is None:
+            raise CommandError('Для замера нужен хотя бы один комментарий')
+        clients = {False: make_client(), True: make_client(comment.author)}
+        self.stdout.write(
+            f'{"страница":<16} {"p50, мс":>8} {"p99, мс":>8}'
+            f' {"запросов":>8} {"память, КБ":>11}'
+        )
+        results = {}
+        for name, page in news_pages(comment.news_id, comment.pk).items():
+            metrics = measure_page(
+                clients[page.authorized], page, options['repeat']
+            )
+            if metrics['status'] >= 400:
+                raise CommandError(f'{name}: ответ {metrics["status"]}')
+            results[name] = metrics
+            self.stdout.write(
+                f'{name:<16} {metrics["p50_ms"]:>8.2f}'
+                f' {metrics["p99_ms"]:>8.2f} {metrics["queries"]:>8}'
+                f' {metrics["peak_kb"]:>11.1f}'
+            )
+        return results
+
+    def report_changes(self, baseline, results):
+        self.stdout.write(
+            f'\n{"размер":>9} {"страница":<16} {"метрика":<8}'
+            f' {"было":>10} {"стало":>10} {"отношение":>9}'
+        )
+        for size, name, metric, old, new, ratio in compare_results(
+            baseline, results
+        ):
+            change = f'{ratio:.2f}' if ratio is not None else '—'
+            self.stdout.write(
+                f'{size:>9} {name:<16} {metric:<8}'
+                f' {old:>10} {new:>10} {change:>9}'
+            )
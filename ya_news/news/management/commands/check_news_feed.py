@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.feed import FEED_KEY, compute_feed, feed_cache, store_feed
+
+
+class Command(BaseCommand):
+    help = 'Сверяет ленту главной в кэше с последними новостями в базе'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Пересобрать ленту, если она расходится с базой.',
+        )
+
+    def handle(self, *args, **options):
+        cached = feed_cache().get(FEED_KEY)
+        news = compute_feed()
+        expected = [item.pk for item in news]
+        if cached is None:
+            self.stdout.write('Ленты нет в кэше, она соберётся при чтении')
+        elif cached == expected:
+            self.stdout.write(self.style.SUCCESS('Лента совпадает с базой'))
+            return
+        else:
+            message = (
+                f'Лента расходится с базой: в кэше {cached}, '
+                f'ожидается {expected}'
+            )
+            if not options['fix']:
+                raise CommandError(message)
+            self.stdout.write(message)
+        if options['fix']:
+            store_feed(news)
+            self.stdout.write(self.style.SUCCESS('Лента пересобрана'))
@@ -0,0 +1,57 @@
+from time import sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news.comment_queue import drain, get_queue
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит комментарии из очереди NEWS_COMMENT_QUEUE в базу '
+        'пачками. Без --once работает, пока её не остановят.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.NEWS_COMMENT_QUEUE_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать текущую очередь и завершиться.',
+        )
+        parser.add_argument(
+            '--depth', action='store_true',
+            help='Только показать размер очереди.',
+        )
+
+    def handle(self, *args, **options):
+        queue = get_queue()
+        if queue is None:
+            raise CommandError('Очередь комментариев не настроена')
+        if options['depth']:
+            depth = queue.depth()
+            self.stdout.write(
+                f'Ожидают: {depth.pending}, в обработке: {depth.leased}'
+            )
+            return
+        total = 0
+        while True:
+            drained = drain(
+                queue, options['batch_size'],
+                settings.NEWS_COMMENT_QUEUE_LEASE_SECONDS,
+            )
+            total += drained
+            if drained:
+                continue
+            if options['once']:
+                break
+            sleep(options['interval'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Перенесено комментариев: {total}')
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from news.models import News
+from news.page_cache import page_cache
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованное количество комментариев у новостей'
+
+    def handle(self, *args, **options):
+        updated = News.objects.recount_comments()
+        page_cache().clear()
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено новостей: {updated}')
+        )
@@ -0,0 +1,41 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.feed import refresh_feed
+from news.page_cache import HOME_KEY, page_cache
+from news.seed import seed_news
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу новостями и комментариями пачками через '
+        'bulk_create. Одинаковый --seed даёт одинаковые данные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=None,
+                            help='По умолчанию — по пять на новость')
+        parser.add_argument('--authors', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        comments = options['comments']
+        if comments is None:
+            comments = options['news'] * 5
+        started = perf_counter()
+        with transaction.atomic():
+            news_ids = seed_news(
+                options['news'], comments, options['seed'],
+                authors=options['authors'],
+            )
+            # bulk_create не шлёт сигналов: главная и лента
+            # сбрасываются явно.
+            page_cache().delete(HOME_KEY)
+            refresh_feed()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано новостей: {len(news_ids)}, комментариев: {comments} '
+            f'за {perf_counter() - started:.1f} с'
+        ))
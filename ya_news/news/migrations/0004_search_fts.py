@@ -0,0 +1,95 @@
+from django.db import migrations
+
+FORWARD_SQL = (
+    """
+    CREATE VIRTUAL TABLE news_news_fts USING fts5(
+        title, text,
+        content='news_news', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER news_news_fts_insert AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_news_fts_delete AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_news_fts_update AFTER UPDATE OF title, text
+    ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE VIRTUAL TABLE news_comment_fts USING fts5(
+        text,
+        content='news_comment', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER news_comment_fts_insert AFTER INSERT ON news_comment
+    BEGIN
+        INSERT INTO news_comment_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_comment_fts_delete AFTER DELETE ON news_comment
+    BEGIN
+        INSERT INTO news_comment_fts(news_comment_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_comment_fts_update AFTER UPDATE OF text
+    ON news_comment BEGIN
+        INSERT INTO news_comment_fts(news_comment_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO news_comment_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    "INSERT INTO news_news_fts(news_news_fts) VALUES ('rebuild')",
+    "INSERT INTO news_comment_fts(news_comment_fts) VALUES ('rebuild')",
+)
+
+BACKWARD_SQL = (
+    'DROP TRIGGER IF EXISTS news_comment_fts_update',
+    'DROP TRIGGER IF EXISTS news_comment_fts_delete',
+    'DROP TRIGGER IF EXISTS news_comment_fts_insert',
+    'DROP TABLE IF EXISTS news_comment_fts',
+    'DROP TRIGGER IF EXISTS news_news_fts_update',
+    'DROP TRIGGER IF EXISTS news_news_fts_delete',
+    'DROP TRIGGER IF EXISTS news_news_fts_insert',
+    'DROP TABLE IF EXISTS news_news_fts',
+)
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_comment_news_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_sqlite(FORWARD_SQL), run_sqlite(BACKWARD_SQL)
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.2.15 on 2026-10-18 16:46
+
+from django.db import migrations, models
+
+# SQLite пересоздаёт news_news при добавлении и удалении столбца,
+# а вместе с таблицей пропадают её триггеры FTS из 0004_search_fts.
+TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_insert
+    AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_delete
+    AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_update
+    AFTER UPDATE OF title, text ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO news_news_fts(news_news_fts) VALUES ('rebuild')",
+)
+
+
+def restore_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_search_fts'),
+    ]
+
+    operations = [
+        # При откате выполняется последней, уже после удаления столбца.
+        migrations.RunPython(
+            migrations.RunPython.noop, restore_triggers
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(
+            restore_triggers, migrations.RunPython.noop
+        ),
+    ]
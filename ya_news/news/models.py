@@ -2,21 +2,64 @@ from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def bump_version(self):
+        """Делает устаревшими закэшированные фрагменты новостей."""
+        return self.update(version=F('version') + 1)
+
+    def add_comments(self, delta):
+        """Сдвигает счётчик комментариев без чтения строк в Python."""
+        return self.update(
+            comment_count=Greatest(F('comment_count') + delta, 0),
+            version=F('version') + 1,
+        )
+
+    def recount_comments(self):
+        """Пересчитывает счётчик комментариев одним агрегирующим запросом."""
+        counts = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(
+            total=Count('pk')
+        ).values('total')
+        return self.update(
+            comment_count=Coalesce(Subquery(counts), 0),
+            version=F('version') + 1,
+        )
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Входит в ключи кэша фрагментов, растёт при любом изменении.
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date', '-id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        self.version = F('version') + 1
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=('version',))
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -32,6 +75,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
@@ -0,0 +1,187 @@
+"""
+Модерация комментариев по стадиям.
+
+Стадия — функция от текста, которая возвращает причину отказа или None.
+Быстрые стадии из NEWS_MODERATION_STAGES выполняются в форме до
+сохранения, медленные из NEWS_MODERATION_DEFERRED_STAGES — в пуле
+потоков после фиксации транзакции, и отклонённый ими комментарий
+удаляется. Итоговый вердикт кэшируется по хэшу нормализованного текста
+и версии словаря, поэтому повторы одного и того же спама отклоняются
+одним чтением кэша, без прогона стадий, а правка словаря делает старые
+вердикты недействительными. Вердикты и счётчики повторов лежат в общем
+для всех процессов кэше NEWS_MODERATION_CACHE_ALIAS: рассылка,
+распределённая по процессам сервера, упирается в тот же предел.
+"""
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+from .models import Comment, News
+from .profanity import WARNING, find_bad_word, normalize, words_version
+
+VERDICT_KEY = 'news:moderation:verdict:{words}:{digest}'
+RECENT_KEY = 'news:moderation:recent:{digest}'
+LINK_RE = re.compile(r'https?://|www\.', re.IGNORECASE)
+REPEAT_RE = re.compile(r'(.)\1{9,}')
+CAPS_MIN_LETTERS = 20
+CAPS_RATIO = 0.7
+
+DUPLICATE_REASON = 'Такой комментарий уже оставляли несколько раз.'
+
+Verdict = namedtuple('Verdict', ('allowed', 'stage', 'reason'))
+ALLOWED = Verdict(True, None, None)
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    """Пул потоков создаётся при первой отложенной проверке."""
+    return ThreadPoolExecutor(
+        max_workers=settings.NEWS_MODERATION_WORKERS,
+        thread_name_prefix='moderation',
+    )
+
+
+def moderation_cache():
+    return caches[settings.NEWS_MODERATION_CACHE_ALIAS]
+
+
+def content_hash(text):
+    """Хэш текста без учёта регистра, пробелов и подмены букв."""
+    return sha256(' '.join(normalize(text).split()).encode()).hexdigest()
+
+
+def verdict_key(digest):
+    return VERDICT_KEY.format(words=words_version(), digest=digest)
+
+
+def word_filter(text):
+    if find_bad_word(text) is not None:
+        return WARNING
+    return None
+
+
+def link_filter(text):
+    if len(LINK_RE.findall(text)) > settings.NEWS_MODERATION_MAX_LINKS:
+        return 'Слишком много ссылок.'
+    return None
+
+
+def spam_filter(text):
+    letters = [char for char in text if char.isalpha()]
+    if (len(letters) >= CAPS_MIN_LETTERS
+            and sum(char.isupper() for char in letters)
+            >= CAPS_RATIO * len(letters)):
+        return 'Не пишите заглавными буквами.'
+    if REPEAT_RE.search(text):
+        return 'Слишком много повторяющихся символов.'
+    return None
+
+
+def duplicate_filter(text):
+    """Один и тот же длинный текст за короткое время — это рассылка."""
+    if len(text) < settings.NEWS_MODERATION_DUPLICATE_MIN_LENGTH:
+        return None
+    key = RECENT_KEY.format(digest=content_hash(text))
+    cache = moderation_cache()
+    cache.add(key, 0, settings.NEWS_MODERATION_DUPLICATE_WINDOW)
+    try:
+        seen = cache.incr(key)
+    except ValueError:
+        # Запись истекла между add и incr.
+        seen = 1
+    if seen > settings.NEWS_MODERATION_DUPLICATE_LIMIT:
+        return DUPLICATE_REASON
+    return None
+
+
+@lru_cache(maxsize=None)
+def load_stages(paths):
+    return tuple(import_string(path) for path in paths)
+
+
+def run_stages(paths, text):
+    for stage in load_stages(tuple(paths)):
+        reason = stage(text)
+        if reason:
+            return Verdict(False, stage.__name__, reason)
+    return ALLOWED
+
+
+def remember(text, verdict):
+    """
+    Кэширует вердикт для текста.
+
+    Отказ duplicate_filter верен только до конца окна повторов,
+    поэтому не кэшируется: precheck читает сам счётчик повторов,
+    который истекает вместе с окном.
+    """
+    if verdict.stage == duplicate_filter.__name__:
+        return
+    moderation_cache().set(
+        verdict_key(content_hash(text)), verdict,
+        settings.NEWS_MODERATION_VERDICT_TIMEOUT,
+    )
+
+
+def precheck(text):
+    """
+    Быстрая проверка при отправке формы.
+
+    Одним чтением кэша берёт вердикт и счётчик повторов текста,
+    затем прогоняет быстрые стадии и запоминает отказ.
+    """
+    digest = content_hash(text)
+    key, recent_key = verdict_key(digest), RECENT_KEY.format(digest=digest)
+    cached = moderation_cache().get_many((key, recent_key))
+    if cached.get(recent_key, 0) > settings.NEWS_MODERATION_DUPLICATE_LIMIT:
+        return Verdict(False, duplicate_filter.__name__, DUPLICATE_REASON)
+    verdict = cached.get(key)
+    if verdict is None:
+        verdict = run_stages(settings.NEWS_MODERATION_STAGES, text)
+        if not verdict.allowed:
+            remember(text, verdict)
+    return verdict
+
+
+def check_deferred(text):
+    """Медленные стадии; их вердикт становится итоговым для текста."""
+    verdict = run_stages(settings.NEWS_MODERATION_DEFERRED_STAGES, text)
+    remember(text, verdict)
+    return verdict
+
+
+def moderate_comment(comment_id):
+    """Проверяет сохранённый комментарий и удаляет его при отказе."""
+    comment = Comment.objects.filter(pk=comment_id).first()
+    if comment is None:
+        return None
+    verdict = check_deferred(comment.text)
+    if not verdict.allowed:
+        with transaction.atomic():
+            deleted, _ = Comment.objects.filter(pk=comment_id).delete()
+            if deleted:
+                News.objects.filter(pk=comment.news_id).add_comments(-1)
+    return verdict
+
+
+def _moderate_in_worker(comment_id):
+    try:
+        moderate_comment(comment_id)
+    finally:
+        # Поток пула переживает задачу, а соединение ему больше не нужно.
+        connections.close_all()
+
+
+def schedule(comment_id):
+    """Отправляет комментарий на медленные стадии после фиксации."""
+    if settings.NEWS_MODERATION_DEFERRED_STAGES:
+        transaction.on_commit(
+            lambda: get_executor().submit(_moderate_in_worker, comment_id)
+        )
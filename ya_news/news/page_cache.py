@@ -0,0 +1,117 @@
+from hashlib import md5
+from time import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+HOME_KEY = 'news:page:home'
+DETAIL_KEY = 'news:page:detail:{pk}'
+
+
+def page_cache():
+    return caches[settings.NEWS_PAGE_CACHE_ALIAS]
+
+
+def invalidate_news(news_id):
+    """Сбрасывает главную и страницу новости после изменений."""
+    page_cache().delete_many((HOME_KEY, DETAIL_KEY.format(pk=news_id)))
+
+
+def is_cacheable(request):
+    """Целиком кэшируются только простые GET анонимных пользователей."""
+    return (request.method in ('GET', 'HEAD') and not request.GET
+            and not request.user.is_authenticated)
+
+
+def make_entry(response):
+    """Готовая страница с ETag и временем создания для кэша."""
+    if hasattr(response, 'render'):
+        response.render()
+    return {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'etag': quote_etag(md5(response.content).hexdigest()),
+        'last_modified': int(time()),
+    }
+
+
+def respond(request, entry, response=None):
+    """Ответ из записи кэша, на условный GET — 304."""
+    if response is None:
+        response = HttpResponse(
+            entry['content'], content_type=entry['content_type']
+        )
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    return get_conditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+        response=response,
+    )
+
+
+class PageCacheKeyMixin:
+    """Ключ страницы в кэше по шаблону и аргументам URL."""
+    page_cache_key = None
+
+    def get_page_cache_key(self):
+        return self.page_cache_key.format(**self.kwargs)
+
+
+class AnonymousPageCacheMixin(PageCacheKeyMixin):
+    """
+    Кэш готовых страниц для анонимных пользователей.
+
+    Страница сохраняется целиком вместе с ETag и временем создания
+    и отдаётся без обращения к базе и шаблонам, пока её не сбросит
+    изменение новости или комментария. Условные GET-запросы
+    получают ответ 304.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if not is_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+        key = self.get_page_cache_key()
+        entry = page_cache().get(key)
+        if entry is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = make_entry(response)
+            page_cache().set(key, entry, settings.NEWS_PAGE_CACHE_TIMEOUT)
+            return respond(request, entry, response)
+        return respond(request, entry)
+
+
+class AsyncAnonymousPageCacheMixin(PageCacheKeyMixin):
+    """
+    Тот же кэш страниц для асинхронных view.
+
+    У кэша Django 3.2 нет асинхронного API, поэтому обращения к нему
+    уходят в пул потоков и не держат цикл событий. Проверка
+    пользователя и отрисовка шаблона могут читать базу, они идут
+    в поток ORM.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        if not await sync_to_async(is_cacheable)(request):
+            return await super().dispatch(request, *args, **kwargs)
+        key = self.get_page_cache_key()
+        entry = await sync_to_async(
+            page_cache().get, thread_sensitive=False
+        )(key)
+        if entry is None:
+            response = await super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = await sync_to_async(make_entry)(response)
+            await sync_to_async(page_cache().set, thread_sensitive=False)(
+                key, entry, settings.NEWS_PAGE_CACHE_TIMEOUT
+            )
+            return respond(request, entry, response)
+        return respond(request, entry)
@@ -0,0 +1,57 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Comment
+
+CURSOR_SEPARATOR = '|'
+
+
+class InvalidCursor(ValueError):
+    """Курсор не удалось разобрать."""
+
+
+def encode_cursor(comment):
+    """Курсор указывает на последний показанный комментарий."""
+    raw = f'{comment.created.isoformat()}{CURSOR_SEPARATOR}{comment.pk}'
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает пару (created, id) из курсора."""
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        raw = urlsafe_b64decode(cursor + padding).decode()
+        created, pk = raw.split(CURSOR_SEPARATOR)
+        return datetime.fromisoformat(created), int(pk)
+    except (Base64Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+
+
+def get_comments_page(news, cursor=None, limit=None):
+    """
+    Страница комментариев к новости по ключу (created, id).
+
+    Запрос идёт по индексу comment_news_created_idx и не зависит
+    от того, сколько комментариев уже пролистано.
+    Возвращает список комментариев и курсор следующей страницы.
+    """
+    limit = limit or settings.COMMENTS_PER_PAGE
+    comments = Comment.objects.filter(news=news)
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        comments = comments.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    comments = list(
+        comments.select_related('author').order_by('created', 'pk')[
+            :limit + 1
+        ]
+    )
+    if len(comments) > limit:
+        comments = comments[:limit]
+        return comments, encode_cursor(comments[-1])
+    return comments, None
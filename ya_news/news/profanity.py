@@ -0,0 +1,163 @@
+import os
+from collections import deque
+from hashlib import sha256
+from threading import Lock
+
+from django.conf import settings
+
+BAD_WORDS = (
+    'редиска',
+    'негодяй',
+    # Дополните список на своё усмотрение.
+)
+WARNING = 'Не ругайтесь!'
+
+# Латинские буквы и цифры, которыми подменяют похожие кириллические.
+HOMOGLYPHS = str.maketrans({
+    'a': 'а',
+    'b': 'в',
+    'c': 'с',
+    'e': 'е',
+    'h': 'н',
+    'k': 'к',
+    'm': 'м',
+    'o': 'о',
+    'p': 'р',
+    't': 'т',
+    'x': 'х',
+    'y': 'у',
+    'ё': 'е',
+    '0': 'о',
+    '3': 'з',
+})
+
+
+def normalize(text):
+    """Приводит текст к нижнему регистру и заменяет гомоглифы."""
+    return text.lower().translate(HOMOGLYPHS)
+
+
+class ProfanityMatcher:
+    """
+    Автомат Ахо — Корасик для поиска запрещённых слов.
+
+    Строится один раз по списку слов, после чего текст проверяется
+    за один проход независимо от размера словаря.
+    """
+
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None]
+        for word in words:
+            self._add(normalize(word.strip()))
+        self._link()
+
+    def __len__(self):
+        return len(self._goto)
+
+    def _add(self, word):
+        if not word:
+            return
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state] = word
+
+    def _link(self):
+        """Проставляет суффиксные ссылки обходом бора в ширину."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._output[next_state] is None:
+                    self._output[next_state] = (
+                        self._output[self._fail[next_state]]
+                    )
+
+    def search(self, text):
+        """Возвращает первое найденное слово или None."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in normalize(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
+
+
+def read_words(path):
+    """Читает словарь: одно слово на строку, # — комментарий."""
+    with open(path, encoding='utf-8') as file:
+        return [
+            line.strip() for line in file
+            if line.strip() and not line.startswith('#')
+        ]
+
+
+_lock = Lock()
+_cache = {'key': None, 'matcher': None}
+
+
+def words_key(default_words):
+    path = getattr(settings, 'NEWS_BAD_WORDS_FILE', None)
+    if path:
+        return (str(path), os.stat(path).st_mtime_ns)
+    return (None, id(default_words))
+
+
+def words_version(default_words=BAD_WORDS):
+    """
+    Версия словаря для ключей кэша.
+
+    Меняется при правке файла NEWS_BAD_WORDS_FILE и одинакова
+    во всех процессах, пока словарь тот же.
+    """
+    path, mtime = words_key(default_words)
+    source = f'{path}:{mtime}' if path else '\n'.join(default_words)
+    return sha256(source.encode()).hexdigest()[:16]
+
+
+def get_matcher(default_words):
+    """
+    Скомпилированный автомат для текущего словаря.
+
+    Если в настройках указан NEWS_BAD_WORDS_FILE, словарь читается
+    из файла и перестраивается при изменении файла, без перезапуска.
+    Иначе используется переданный список слов.
+    """
+    path = getattr(settings, 'NEWS_BAD_WORDS_FILE', None)
+    key = words_key(default_words)
+    if _cache['key'] == key:
+        return _cache['matcher']
+    with _lock:
+        if _cache['key'] != key:
+            words = read_words(path) if path else default_words
+            _cache['matcher'] = ProfanityMatcher(words)
+            _cache['key'] = key
+    return _cache['matcher']
+
+
+def reload_matcher():
+    """Сбрасывает автомат, он будет построен заново при следующей проверке."""
+    with _lock:
+        _cache['key'] = None
+
+
+def find_bad_word(text):
+    """Первое запрещённое слово в тексте или None."""
+    return get_matcher(BAD_WORDS).search(text)
@@ -1,85 +1,147 @@
 from datetime import datetime, timedelta
+from statistics import median
+from time import perf_counter
 
 import pytest
+from asgiref.sync import async_to_sync
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client
+from django.core.cache import caches
+from django.test import Client, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
 from news.models import Comment, News
+from yacommon.testing import FAST_LOGIN_SETTINGS, SESSIONS_CACHE, fast_login
+
+from .snapshot import Ref, Snapshot
 
 User = get_user_model()
 
+SETUP_TIMINGS = pytest.StashKey()
+
 TEXT_COMMENT = 'Текст комментария'
 NEW_TEXT_COMMENT = {'text': 'Новый текст'}
 
 
+def pytest_configure(config):
+    config.stash[SETUP_TIMINGS] = []
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    started = perf_counter()
+    yield
+    item.config.stash[SETUP_TIMINGS].append(
+        (perf_counter() - started, item.nodeid)
+    )
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Сколько стоит подготовка фикстур одного теста."""
+    timings = config.stash.get(SETUP_TIMINGS, None)
+    if not timings:
+        return
+    total = sum(seconds for seconds, _ in timings)
+    slowest, node_id = max(timings)
+    terminalreporter.write_sep('-', 'подготовка тестов')
+    terminalreporter.write_line(
+        f'тестов: {len(timings)}, всего {total:.2f} с, '
+        f'медиана {median(seconds for seconds, _ in timings) * 1000:.1f} мс, '
+        f'дольше всего {slowest * 1000:.1f} мс: {node_id}'
+    )
+
+
+@pytest.fixture(scope='session', autouse=True)
+def fast_login_settings():
+    with override_settings(**FAST_LOGIN_SETTINGS):
+        yield
+
+
+@pytest.fixture(scope='session')
+def snapshot():
+    """Строки всех фикстур с данными, описанные один раз на сессию."""
+    snapshot = Snapshot()
+    today, now = datetime.today(), timezone.now()
+    snapshot.add('author', User, [{'username': 'Блатной'}])
+    snapshot.add('not_author', User, [{'username': 'Салфетка'}])
+    snapshot.add('news', News, [{
+        'title': 'Заголовок',
+        'text': 'Текст новости',
+        'date': today,
+    }])
+    snapshot.add('comment', Comment, [{
+        'text': TEXT_COMMENT,
+        'news_id': Ref('news'),
+        'author_id': Ref('author'),
+    }])
+    snapshot.add('list_news', News, [
+        {
+            'title': f'Новость {index}',
+            'text': 'Текст новости',
+            'date': today - timedelta(days=index),
+        }
+        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE)
+    ])
+    snapshot.add('list_comments', Comment, [
+        {
+            'text': f'Текст {index}',
+            'news_id': Ref('news'),
+            'author_id': Ref('author'),
+            'created': now + timedelta(days=index),
+        }
+        for index in range(2)
+    ])
+    return snapshot
+
+
 @pytest.fixture
-def author(django_user_model):
-    return django_user_model.objects.create(username='Блатной')
+def author(snapshot):
+    author, = snapshot.restore('author')
+    return author
 
 
 @pytest.fixture
-def author_client(author, client):
-    client = Client()
-    client.force_login(author)
-    return client
+def author_client(author):
+    return fast_login(Client(), author)
 
 
 @pytest.fixture
-def not_author_client(django_user_model, client):
-    user = django_user_model.objects.create(username='Салфетка')
-    client.force_login(user)
-    return client
+def not_author_client(snapshot, client):
+    user, = snapshot.restore('not_author')
+    return fast_login(client, user)
 
 
 @pytest.fixture
-def news():
-    news = News.objects.create(
-        title='Заголовок',
-        text='Текст новости',
-        date=datetime.today(),
-    )
+def asgi_get(async_client):
+    """GET-запрос через ASGI-обработчик из синхронного теста."""
+    def get(url):
+        async def request():
+            return await async_client.get(url)
+        return async_to_sync(request)()
+    return get
+
+
+@pytest.fixture
+def news(snapshot):
+    news, = snapshot.restore('news')
     return news
 
 
 @pytest.fixture
-def comment(news, author):
-    comment = Comment.objects.create(
-        text=TEXT_COMMENT,
-        news=news,
-        author=author
-    )
+def comment(snapshot, news, author):
+    comment, = snapshot.restore('comment', news=[news], author=[author])
     return comment
 
 
 @pytest.fixture
-def list_news():
-    today, list_news = datetime.today(), []
-    for index in range(settings.NEWS_COUNT_ON_HOME_PAGE):
-        news = News.objects.create(
-            title='Новость {index}',
-            text='Текст новости',
-        )
-        news.date = today - timedelta(days=index)
-        news.save()
-        list_news.append(news)
-    return list_news
+def list_news(snapshot):
+    return snapshot.restore('list_news')
 
 
 @pytest.fixture
-def list_comments(news, author):
-    now, list_comment = timezone.now(), []
-    for index in range(2):
-        comment = Comment.objects.create(
-            text='Текст {index}',
-            news=news,
-            author=author,
-        )
-        comment.created = now + timedelta(days=index)
-        comment.save()
-        list_comment.append(comment)
+def list_comments(snapshot, news, author):
+    return snapshot.restore('list_comments', news=[news], author=[author])
 
 
 @pytest.fixture
@@ -87,6 +149,11 @@ def news_detail_url(news):
     return reverse('news:detail', args=(news.id,))
 
 
+@pytest.fixture
+def news_comments_url(news):
+    return reverse('news:comments', args=(news.id,))
+
+
 @pytest.fixture
 def comment_delete_url(comment):
     return reverse('news:delete', args=(comment.id,))
@@ -102,11 +169,24 @@ def enable_db_access_for_all_tests(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Сессии остаются: их переиспользует fast_login.
+    for alias in settings.CACHES:
+        if alias != SESSIONS_CACHE:
+            caches[alias].clear()
+
+
 @pytest.fixture
 def news_home_url():
     return reverse('news:home')
 
 
+@pytest.fixture
+def news_search_url():
+    return reverse('news:search')
+
+
 @pytest.fixture
 def login_url():
     return reverse('users:login')
@@ -0,0 +1,70 @@
+"""
+Снимок строк для фикстур.
+
+Строки каждой фикстуры описываются один раз на сессию и хранятся
+в памяти. Фикстура восстанавливает свой набор одним bulk_create на
+модель вместо create() и save() на каждую строку, а после теста строки
+исчезают при откате его транзакции.
+
+bulk_create в SQLite не возвращает id, поэтому restore назначает их сам,
+сразу после наибольшего id в таблице: такие id свободны, а объекты,
+которые тест создаст потом, база пронумерует уже после них. Связь
+с другим набором задаётся через Ref и при восстановлении заменяется
+на id объекта, который фикстура уже получила, без чтения из базы.
+"""
+from collections import namedtuple
+
+from django.db.models import Case, Max, Value, When
+
+Ref = namedtuple('Ref', ('name', 'index'), defaults=(0,))
+
+
+class Snapshot:
+
+    def __init__(self):
+        self.sets = {}
+
+    def add(self, name, model, rows):
+        """Запоминает набор строк name."""
+        self.sets[name] = (model, rows)
+
+    def restore(self, name, **related):
+        """
+        Записывает набор name в базу и возвращает его объекты.
+
+        related передаёт уже восстановленные наборы, на которые
+        ссылаются Ref в строках. bulk_create подставляет текущее время
+        в поля auto_now_add, поэтому заданные в снимке значения таких
+        полей возвращаются одним UPDATE на поле.
+        """
+        model, rows = self.sets[name]
+        first_id = (
+            model.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+        ) + 1
+        rows = [
+            {
+                **{
+                    field: (
+                        related[value.name][value.index].pk
+                        if isinstance(value, Ref) else value
+                    )
+                    for field, value in fields.items()
+                },
+                'pk': pk,
+            }
+            for pk, fields in enumerate(rows, start=first_id)
+        ]
+        objects = model.objects.bulk_create(model(**fields) for fields in rows)
+        for field in model._meta.concrete_fields:
+            if not (getattr(field, 'auto_now_add', False)
+                    and field.name in rows[0]):
+                continue
+            model.objects.filter(
+                pk__in=[fields['pk'] for fields in rows]
+            ).update(**{field.name: Case(*(
+                When(pk=fields['pk'], then=Value(fields[field.name]))
+                for fields in rows
+            ), output_field=field)})
+            for obj, fields in zip(objects, rows):
+                setattr(obj, field.name, fields[field.name])
+        return objects
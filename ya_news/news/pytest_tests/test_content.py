@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta
 
+import pytest
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.utils import timezone
 
+from news.feed import FEED_KEY, feed_cache
 from news.forms import CommentForm
 from news.models import Comment, News
 
@@ -79,3 +83,184 @@ def test_authorized_client_has_form(client, author, news_detail_url):
     response = client.get(news_detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+def test_home_shows_denormalized_comment_count(
+        client, news_home_url, news, list_comments
+):
+    """
+    Проверка количества комментариев на главной странице.
+    Счётчик берётся из поля comment_count, а не из comment_set.
+    """
+    call_command('recount_comments')
+    response = client.get(news_home_url)
+    shown_news, = response.context['object_list']
+    assert shown_news.comment_count == 2
+    assert 'Комментариев: 2' in response.content.decode()
+
+
+def test_home_query_count_does_not_depend_on_comments(
+        client, news_home_url, news, list_comments, django_assert_num_queries
+):
+    """
+    Проверка числа запросов на главной странице.
+    Комментарии не загружаются, страница строится одним запросом.
+    """
+    with django_assert_num_queries(1):
+        client.get(news_home_url)
+
+
+def test_comments_are_paginated_by_cursor(
+        client, settings, news, author, news_detail_url, news_comments_url
+):
+    """
+    Проверка постраничного вывода комментариев.
+    На странице новости только первая порция, остальные
+    догружаются по курсору в хронологическом порядке.
+    """
+    settings.COMMENTS_PER_PAGE = 2
+    now = timezone.now()
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}',
+                created=now + timedelta(minutes=index))
+        for index in range(5)
+    )
+    response = client.get(news_detail_url)
+    pages = [response.context['comments']]
+    cursor = response.context['next_cursor']
+    while cursor:
+        response = client.get(news_comments_url, {'cursor': cursor})
+        pages.append(response.context['comments'])
+        cursor = response.context['next_cursor']
+    texts = [[comment.text for comment in page] for page in pages]
+    assert texts == [
+        ['Текст 0', 'Текст 1'], ['Текст 2', 'Текст 3'], ['Текст 4']
+    ]
+
+
+def test_comments_page_as_json(client, settings, list_comments,
+                               news_detail_url, news_comments_url):
+    """Следующая порция комментариев доступна в виде JSON."""
+    settings.COMMENTS_PER_PAGE = 1
+    cursor = client.get(news_detail_url).context['next_cursor']
+    page = client.get(
+        news_comments_url, {'cursor': cursor, 'format': 'json'}
+    ).json()
+    assert page['next_cursor'] is None
+    assert 'Текст' in page['html']
+
+
+def test_search_finds_news_and_comments(client, news, comment,
+                                        news_search_url):
+    """
+    Проверка поиска.
+    Находятся и новости, и комментарии, совпадения выделены.
+    """
+    response = client.get(news_search_url, {'q': 'текста'})
+    hits = {hit.kind: hit for hit in response.context['object_list']}
+    assert set(hits) == {'news', 'comment'}
+    assert hits['news'].news_id == hits['comment'].news_id == news.pk
+    assert hits['comment'].snippet == '<mark>Текст</mark> комментария'
+
+
+def test_search_filters_by_news_date(client, list_news, news_search_url):
+    """Проверка фильтра поиска по дате новости."""
+    date_from = News.objects.get(pk=list_news[2].pk).date
+    response = client.get(
+        news_search_url, {'q': 'новости', 'date_from': date_from}
+    )
+    found = {hit.news_id for hit in response.context['object_list']}
+    assert found == {news.pk for news in list_news[:3]}
+
+
+def test_fragments_refresh_after_comment_edit(
+        author_client, client, comment, news_detail_url, comment_edit_url
+):
+    """
+    Проверка кэша фрагментов.
+    Правка комментария меняет версию новости, и закэшированные
+    фрагменты не показываются ни анонимам, ни авторизованным.
+    """
+    client.get(news_detail_url)
+    author_client.get(news_detail_url)
+    author_client.post(comment_edit_url, data={'text': 'Исправлено'})
+    for test_client in (client, author_client):
+        response = test_client.get(news_detail_url)
+        assert 'Исправлено' in response.content.decode()
+
+
+def test_cached_comments_keep_user_links(
+        author_client, not_author_client, comment, news_detail_url,
+        comment_edit_url
+):
+    """Ссылки на правку видит только автор, даже из кэша."""
+    not_author_client.get(news_detail_url)
+    response = author_client.get(news_detail_url)
+    assert comment_edit_url in response.content.decode()
+    response = not_author_client.get(news_detail_url)
+    assert comment_edit_url not in response.content.decode()
+
+
+def test_anonymous_page_cache_answers_conditional_get(
+        client, news, news_home_url, django_assert_num_queries
+):
+    """
+    Проверка кэша страниц.
+    Повторный запрос анонима не обращается к базе,
+    а условный запрос с известным ETag получает 304.
+    """
+    etag = client.get(news_home_url)['ETag']
+    with django_assert_num_queries(0):
+        response = client.get(news_home_url)
+    assert response['ETag'] == etag
+    response = client.get(news_home_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+
+def test_anonymous_page_cache_invalidated_by_comment(
+        client, author_client, news, news_detail_url
+):
+    """Новый комментарий сбрасывает закэшированную страницу новости."""
+    client.get(news_detail_url)
+    author_client.post(news_detail_url, data={'text': 'Свежий комментарий'})
+    response = client.get(news_detail_url)
+    assert 'Свежий комментарий' in response.content.decode()
+
+
+def test_home_feed_follows_news_writes(author_client, list_news,
+                                       news_home_url):
+    """Лента главной обновляется при создании и удалении новостей."""
+    author_client.get(news_home_url)
+    fresh = News.objects.create(
+        title='Свежая', text='Текст', date=datetime.today() + timedelta(1)
+    )
+    shown = list(author_client.get(news_home_url).context['object_list'])
+    assert shown[0] == fresh
+    fresh.delete()
+    shown = list(author_client.get(news_home_url).context['object_list'])
+    assert shown == sorted(list_news, key=lambda news: news.date,
+                           reverse=True)
+
+
+def test_home_feed_served_by_primary_key(author_client, list_news,
+                                         news_home_url,
+                                         django_assert_num_queries):
+    """
+    С готовой лентой главная читает новости по id, без сортировки,
+    а пользователь берётся из кэша.
+    """
+    author_client.get(news_home_url)
+    with django_assert_num_queries(1) as context:
+        author_client.get(news_home_url)
+    assert '"news_news"."id" IN' in context.captured_queries[-1]['sql']
+
+
+def test_check_news_feed_command(list_news, news_home_url, client):
+    """Команда находит расхождение ленты с базой и исправляет его."""
+    client.get(news_home_url)
+    call_command('check_news_feed')
+    feed_cache().set(FEED_KEY, [list_news[-1].pk])
+    with pytest.raises(CommandError):
+        call_command('check_news_feed')
+    call_command('check_news_feed', fix=True)
+    call_command('check_news_feed')
@@ -0,0 +1,147 @@
+from importlib import import_module
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.db import OperationalError, connections
+from django.db.utils import load_backend
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from news.models import News
+from yacommon.auth import USER_KEY, user_cache
+from yacommon.routers import STICKY_COOKIE, ReplicaMiddleware, ReplicaRouter
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def open_tuned(tmp_path):
+    """Соединения настроенного бэкенда с общим временным файлом базы."""
+    backend = load_backend('yacommon.sqlite_backend')
+    opened = []
+
+    def open_connection(**settings_dict):
+        connection = backend.DatabaseWrapper({
+            **connections.settings['default'],
+            'NAME': str(tmp_path / 'tuned.sqlite3'),
+            **settings_dict,
+        }, alias=f'tuned_{len(opened)}')
+        opened.append(connection)
+        return connection
+
+    yield open_connection
+    for connection in opened:
+        connection.close()
+
+
+def test_pragmas_applied(open_tuned):
+    with open_tuned().cursor() as cursor:
+        pragmas = {
+            name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+            for name in ('journal_mode', 'synchronous', 'busy_timeout')
+        }
+    assert pragmas == {
+        'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000
+    }
+
+
+def test_transaction_takes_write_lock_at_begin(open_tuned):
+    """BEGIN IMMEDIATE не даёт второй транзакции начаться до записи."""
+    writer = open_tuned()
+    waiting = open_tuned(PRAGMAS={'busy_timeout': 0})
+    writer._start_transaction_under_autocommit()
+    with pytest.raises(OperationalError, match='locked'):
+        waiting._start_transaction_under_autocommit()
+    writer.cursor().execute('ROLLBACK')
+
+
+@pytest.mark.parametrize(
+    'method, url_name, authenticated, anonymous_reads, cookies, expected_db',
+    (
+        ('get', 'news:home', True, False, {}, 'replica'),
+        ('get', 'news:detail', True, False, {}, 'replica'),
+        ('get', 'news:home', False, False, {}, None),
+        ('get', 'news:home', False, True, {}, 'replica'),
+        ('get', 'news:home', True, False, {STICKY_COOKIE: '1'}, None),
+        ('get', 'news:search', True, False, {}, None),
+        ('post', 'news:detail', True, False, {}, None),
+    )
+)
+def test_replica_routing(rf, settings, author, news, method, url_name,
+                         authenticated, anonymous_reads, cookies,
+                         expected_db):
+    """Чтения отмеченных страниц идут на реплику, остальное — в default."""
+    settings.DATABASE_REPLICAS = ['replica']
+    settings.REPLICA_ANONYMOUS_READS = anonymous_reads
+    args = (news.pk,) if url_name == 'news:detail' else ()
+    request = getattr(rf, method)(reverse(url_name, args=args))
+    request.COOKIES.update(cookies)
+    request.user = author if authenticated else AnonymousUser()
+    request.resolver_match = resolve(request.path)
+    routed = []
+
+    def view(request):
+        middleware.process_view(request, None, (), {})
+        routed.append(ReplicaRouter().db_for_read(News))
+        return HttpResponse()
+
+    middleware = ReplicaMiddleware(view)
+    middleware(request)
+    assert routed == [expected_db]
+
+
+def test_write_pins_user_to_primary(settings, author_client, news_detail_url):
+    settings.DATABASE_REPLICAS = ['replica']
+    response = author_client.post(news_detail_url, {'text': 'Текст'})
+    assert response.cookies[STICKY_COOKIE]['max-age'] == (
+        settings.REPLICA_STICKY_SECONDS
+    )
+
+
+@pytest.mark.parametrize('engine', settings.SESSION_ENGINES)
+@pytest.mark.parametrize('value, saved', (('dark', False), ('light', True)))
+def test_unchanged_session_is_not_saved(settings, engine, value, saved):
+    """Присваивание прежнего значения не пересохраняет сессию."""
+    settings.SESSION_ENGINE = settings.SESSION_ENGINES[engine]
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session['theme'] = 'dark'
+    session.save()
+
+    def view(request):
+        request.session['theme'] = value
+        return HttpResponse()
+
+    request = RequestFactory().get('/')
+    request.COOKIES[settings.SESSION_COOKIE_NAME] = session.session_key
+    response = SessionMiddleware(view)(request)
+    assert (settings.SESSION_COOKIE_NAME in response.cookies) is saved
+
+
+def test_user_lookup_cached_until_saved(author, author_client,
+                                        news_home_url):
+    """Пользователь читается из кэша, пока его не сохранят."""
+    author_client.get(news_home_url)
+    with CaptureQueriesContext(connections['default']) as context:
+        author_client.get(news_home_url)
+    assert not any(
+        '"auth_user"' in query['sql'] for query in context.captured_queries
+    )
+    key = USER_KEY.format(pk=author.pk)
+    assert user_cache().get(key) is not None
+    author.first_name = 'Автор'
+    author.save()
+    assert user_cache().get(key) is None
+    response = author_client.get(news_home_url)
+    assert response.context['user'].first_name == 'Автор'
+
+
+def test_snapshot_ids_follow_created_rows(author, admin_client,
+                                          not_author_client, comment):
+    """Строки снимка не занимают id объектов, созданных до них в тесте."""
+    assert get_user_model().objects.count() == 3
+    assert comment.author_id == author.pk
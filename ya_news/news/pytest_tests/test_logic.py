@@ -1,7 +1,20 @@
+import os
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
 from pytest_django.asserts import assertFormError
 
+from news.comment_queue import get_queue
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.models import Comment, News
+from news.moderation import (DUPLICATE_REASON, RECENT_KEY, check_deferred,
+                             content_hash, duplicate_filter,
+                             moderate_comment, moderation_cache, precheck)
+from news.profanity import ProfanityMatcher, get_matcher
+from news.seed import seed_news
+from yacommon.testing import SHARED_CACHE
 
 from .conftest import NEW_TEXT_COMMENT, TEXT_COMMENT
 from .constants import assert_not_found, assert_redirects_to_comments
@@ -25,6 +38,8 @@ def test_user_can_create_comment(author_client, author, news_detail_url, news):
     assert comment.text == NEW_TEXT_COMMENT['text']
     assert comment.news.id == news.id
     assert comment.author == author
+    news.refresh_from_db()
+    assert news.comment_count == 1
 
 
 def test_user_cant_use_bad_words(author_client, news_detail_url):
@@ -45,6 +60,109 @@ def test_user_cant_use_bad_words(author_client, news_detail_url):
     assert comments_count == expected_comment_count
 
 
+def test_user_cant_post_many_links(author_client, news_detail_url):
+    """Быстрая стадия модерации отклоняет комментарий со ссылками."""
+    links = ' '.join(f'https://spam.example/{index}' for index in range(3))
+    response = author_client.post(news_detail_url, data={'text': links})
+    assertFormError(response, 'form', 'text', 'Слишком много ссылок.')
+    assert Comment.objects.count() == 0
+
+
+def test_rejected_text_verdict_is_cached(settings, author_client,
+                                         news_detail_url):
+    """Повтор отклонённого текста отклоняется по кэшу, без стадий."""
+    bad_words_data = {'text': f'Какой-то текст, {BAD_WORDS[0]}'}
+    author_client.post(news_detail_url, data=bad_words_data)
+    settings.NEWS_MODERATION_STAGES = ()
+    response = author_client.post(news_detail_url, data=bad_words_data)
+    assertFormError(response, 'form', 'text', WARNING)
+    assert Comment.objects.count() == 0
+
+
+def test_duplicate_flood_removed_by_deferred_moderation(
+        settings, author, author_client, news, news_detail_url
+):
+    """
+    Сверх лимита одинаковые комментарии удаляются после сохранения,
+    а следующий такой же отклоняет уже форма.
+    """
+    text = 'Купите наши замечательные слоны недорого'
+    comments = Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=text)
+        for _ in range(settings.NEWS_MODERATION_DUPLICATE_LIMIT + 1)
+    )
+    News.objects.recount_comments()
+    for comment in Comment.objects.order_by('pk'):
+        moderate_comment(comment.pk)
+    news.refresh_from_db()
+    assert news.comment_count == len(comments) - 1
+    assert Comment.objects.count() == len(comments) - 1
+    response = author_client.post(news_detail_url, data={'text': text})
+    assert response.context['form'].errors['text']
+
+
+def test_duplicate_verdict_ends_with_window(
+        settings, author, author_client, news, news_detail_url
+):
+    """Отказ за повторы не действует после окна повторов."""
+    text = 'Купите наши замечательные слоны недорого'
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=text)
+        for _ in range(settings.NEWS_MODERATION_DUPLICATE_LIMIT + 1)
+    )
+    for comment in Comment.objects.order_by('pk'):
+        moderate_comment(comment.pk)
+    assert not precheck(text).allowed
+    # Окно закончилось: счётчик повторов истёк.
+    moderation_cache().delete(RECENT_KEY.format(digest=content_hash(text)))
+    response = author_client.post(news_detail_url, data={'text': text})
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_duplicates_counted_across_processes(settings):
+    """Повторы, которые засчитал другой процесс, входят в тот же предел."""
+    text = 'Купите наши замечательные слоны недорого'
+    other_process_cache = caches.create_connection(SHARED_CACHE)
+    other_process_cache.set(
+        RECENT_KEY.format(digest=content_hash(text)),
+        settings.NEWS_MODERATION_DUPLICATE_LIMIT,
+    )
+    assert duplicate_filter(text) == DUPLICATE_REASON
+    assert precheck(text).reason == DUPLICATE_REASON
+
+
+def test_words_file_change_invalidates_verdicts(settings, tmp_path):
+    """Вердикт, вынесенный по старому словарю, после его правки не берётся."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('капуста\n', encoding='utf-8')
+    settings.NEWS_BAD_WORDS_FILE = words_file
+    assert check_deferred('Морковка!').allowed
+    words_file.write_text('морковка\n', encoding='utf-8')
+    os.utime(words_file, ns=(0, 1))
+    assert precheck('Морковка!').reason == WARNING
+
+
+def test_matcher_sees_latin_homoglyphs():
+    """Латинские буквы вместо кириллических не обходят фильтр."""
+    matcher = ProfanityMatcher(['редиска', 'негодяй'])
+    assert matcher.search('Вот ты PEДucKA') is None
+    assert matcher.search('Вот ты PEДИCKA!') == 'редиска'
+    assert matcher.search('Ну и нeгoдяй') == 'негодяй'
+    assert matcher.search('Хороший текст') is None
+
+
+def test_matcher_reloads_words_file(settings, tmp_path):
+    """Словарь из файла перечитывается после его изменения."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# словарь\nкапуста\n', encoding='utf-8')
+    settings.NEWS_BAD_WORDS_FILE = words_file
+    assert get_matcher(BAD_WORDS).search('Капуста!') == 'капуста'
+    words_file.write_text('морковка\n', encoding='utf-8')
+    os.utime(words_file, ns=(0, 1))
+    assert get_matcher(BAD_WORDS).search('Капуста!') is None
+    assert get_matcher(BAD_WORDS).search('Морковка!') == 'морковка'
+
+
 def test_author_can_delete_comment(author_client,
                                    news_detail_url, comment_delete_url
                                    ):
@@ -54,6 +172,7 @@ def test_author_can_delete_comment(author_client,
     assert_redirects_to_comments(response, news_detail_url)
     comments_count = Comment.objects.count()
     assert comments_count == expected_comment_count - 1
+    assert News.objects.get().comment_count == 0
 
 
 def test_user_cant_delete_comment_of_another_user(admin_client,
@@ -89,3 +208,60 @@ def test_user_cant_edit_comment_of_another_user(admin_client, comment,
     assert comments_count == expected_comment_count
     comment.refresh_from_db()
     assert comment.text == TEXT_COMMENT
+
+
+def test_recount_comments_command(news, list_comments):
+    """Команда recount_comments восстанавливает счётчик комментариев."""
+    News.objects.filter(pk=news.pk).update(comment_count=100)
+    call_command('recount_comments')
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.filter(news=news).count()
+
+
+def test_queued_comment_saved_by_drain(settings, tmp_path, author_client,
+                                       author, news_detail_url, news):
+    """В режиме очереди комментарий пишется в базу командой drain_comments."""
+    settings.NEWS_COMMENT_QUEUE = tmp_path / 'queue.sqlite3'
+    response = author_client.post(news_detail_url, data=NEW_TEXT_COMMENT)
+    assert_redirects_to_comments(response, news_detail_url)
+    assert Comment.objects.count() == 0
+    assert get_queue().depth() == (1, 0)
+    call_command('drain_comments', once=True)
+    comment = Comment.objects.get()
+    assert (comment.text, comment.author, comment.news) == (
+        NEW_TEXT_COMMENT['text'], author, news
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert get_queue().depth() == (0, 0)
+
+
+def test_unacked_comments_are_delivered_again(settings, tmp_path):
+    """Записи без подтверждения снова выдаются после конца аренды."""
+    settings.NEWS_COMMENT_QUEUE = tmp_path / 'queue.sqlite3'
+    queue = get_queue()
+    queue.put(1, 1, 'Текст')
+    crashed = queue.lease(10, seconds=-1)
+    redelivered = queue.lease(10, seconds=60)
+    assert redelivered == crashed
+    assert queue.lease(10, seconds=60) == []
+    assert queue.depth() == (0, 1)
+    queue.ack([entry.id for entry in redelivered])
+    assert queue.depth() == (0, 0)
+
+
+def test_seed_is_repeatable():
+    """Одинаковый seed даёт одинаковые новости, авторы не дублируются."""
+    def titles(news_ids):
+        return list(News.objects.filter(
+            pk__in=news_ids
+        ).order_by('pk').values_list('title', flat=True))
+
+    first = seed_news(5, 30, seed=1, authors=3)
+    second = seed_news(5, 30, seed=1, authors=3)
+    assert titles(first) == titles(second)
+    assert get_user_model().objects.count() == 3
+    assert Comment.objects.values('author').distinct().count() == 3
+    assert sum(
+        News.objects.values_list('comment_count', flat=True)
+    ) == 60
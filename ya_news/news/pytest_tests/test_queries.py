@@ -0,0 +1,134 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from news import urls
+from news.management.commands.bench_urls import news_pages
+from news.models import Comment
+from yacommon.benchmarks import Page, make_client, measure_page, uncovered
+from yacommon.query_budget import QueryBudgetExceeded, QueryRecorder
+from yacommon.testing import query_plan_problems
+
+LOGIN_URL = pytest.lazy_fixture('login_url')  # type: ignore
+SIGNUP_URL = pytest.lazy_fixture('signup_url')  # type: ignore
+DETAIL_URL = pytest.lazy_fixture('news_detail_url')  # type: ignore
+COMMENTS_URL = pytest.lazy_fixture('news_comments_url')  # type: ignore
+EDIT_URL = pytest.lazy_fixture('comment_edit_url')  # type: ignore
+DELETE_URL = pytest.lazy_fixture('comment_delete_url')  # type: ignore
+HOME_URL = pytest.lazy_fixture('news_home_url')  # type: ignore
+SEARCH_URL = pytest.lazy_fixture('news_search_url')  # type: ignore
+
+ANON_CLIENT = pytest.lazy_fixture('client')  # type: ignore
+AUTHOR_CLIENT = pytest.lazy_fixture('author_client')  # type: ignore
+
+COMMENT_DATA = {'text': 'Текст'}
+SEARCH_DATA = {'q': 'текст'}
+
+# Запросы авторизованного пользователя начинаются с чтения
+# пользователя, оно входит в счёт. Сессии в тестах хранятся в кэше,
+# см. FAST_LOGIN_SETTINGS, с сессиями в базе добавится ещё один запрос.
+QUERY_BUDGETS = (
+    (ANON_CLIENT, 'get', HOME_URL, None, 1),
+    (ANON_CLIENT, 'get', DETAIL_URL, None, 2),
+    (ANON_CLIENT, 'get', COMMENTS_URL, None, 2),
+    (ANON_CLIENT, 'get', SEARCH_URL, SEARCH_DATA, 4),
+    (ANON_CLIENT, 'get', LOGIN_URL, None, 0),
+    (ANON_CLIENT, 'get', SIGNUP_URL, None, 0),
+    (AUTHOR_CLIENT, 'get', HOME_URL, None, 2),
+    (AUTHOR_CLIENT, 'get', DETAIL_URL, None, 3),
+    (AUTHOR_CLIENT, 'post', DETAIL_URL, COMMENT_DATA, 6),
+    (AUTHOR_CLIENT, 'get', EDIT_URL, None, 2),
+    (AUTHOR_CLIENT, 'post', EDIT_URL, COMMENT_DATA, 6),
+    (AUTHOR_CLIENT, 'get', DELETE_URL, None, 2),
+    (AUTHOR_CLIENT, 'post', DELETE_URL, None, 6),
+)
+
+
+@pytest.mark.parametrize(
+    'test_client, method, url, data, expected_queries', QUERY_BUDGETS
+)
+def test_query_count(test_client, method, url, data, expected_queries,
+                     comment, django_assert_num_queries):
+    with django_assert_num_queries(expected_queries):
+        getattr(test_client, method)(url, data)
+
+
+@pytest.mark.parametrize(
+    'test_client, method, url, data',
+    [case[:4] for case in QUERY_BUDGETS]
+)
+def test_queries_use_indexes(test_client, method, url, data, comment):
+    """Запросы страниц не обходят таблицы и не сортируют без индекса."""
+    with CaptureQueriesContext(connection) as context:
+        # Повторный запрос идёт по уже заполненным кэшам.
+        getattr(test_client, method)(url, data)
+        getattr(test_client, method)(url, data)
+    assert query_plan_problems(context.captured_queries) == {}
+
+
+def test_over_budget_raises(settings, client, news_home_url):
+    """Страница сверх бюджета запросов роняет запрос в тестах."""
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(news_home_url)
+
+
+def test_budget_counts_queries_under_asgi(
+        settings, asgi_get, news_detail_url
+):
+    """Запросы из sync_to_async попадают в счёт своего HTTP-запроса."""
+    settings.QUERY_BUDGETS = {'news:detail': 1}
+    with pytest.raises(QueryBudgetExceeded, match='2 запросов'):
+        asgi_get(news_detail_url)
+
+
+def test_over_budget_logged(settings, client, news_home_url, caplog):
+    """Без QUERY_BUDGET_RAISE превышение бюджета только пишется в лог."""
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    settings.QUERY_BUDGET_RAISE = False
+    response = client.get(news_home_url)
+    assert response.status_code == HTTPStatus.OK
+    assert 'news:home: 1 запросов при бюджете 0' in caplog.text
+    assert 'Server-Timing' in response
+
+
+def test_over_budget_write_logged(settings, author_client, news,
+                                  news_detail_url, caplog):
+    """Пишущий запрос сверх бюджета не падает: его изменения уже в базе."""
+    settings.QUERY_BUDGETS = {'news:detail': 0}
+    response = author_client.post(news_detail_url, COMMENT_DATA)
+    assert response.status_code == HTTPStatus.FOUND
+    assert Comment.objects.count() == 1
+    assert 'news:detail:' in caplog.text
+
+
+def test_repeated_selects_detected():
+    """Повторы одного чтения с разными значениями считаются N+1."""
+    recorder = QueryRecorder()
+    for pk in range(5):
+        recorder(
+            lambda *args: None,
+            f'SELECT * FROM news_news WHERE id = {pk}', None, False, None,
+        )
+    recorder(lambda *args: None, 'INSERT INTO news_news', None, False, None)
+    assert recorder.repeated(5) == [
+        ('SELECT * FROM news_news WHERE id = ?', 5)
+    ]
+
+
+def test_bench_measures_every_page():
+    """Команда bench_urls замеряет каждую страницу приложения."""
+    assert uncovered(urls.urlpatterns, urls.app_name, news_pages(1, 1)) == []
+
+
+def test_measure_page_rolls_back_writes(author, news, news_detail_url):
+    """Замер пишущей страницы считает её запросы и не оставляет данных."""
+    metrics = measure_page(
+        make_client(author), Page('post', news_detail_url, COMMENT_DATA),
+        repeat=2,
+    )
+    # Новость, вставка и счётчик комментариев; пользователь уже в кэше.
+    assert (metrics['status'], metrics['queries']) == (HTTPStatus.FOUND, 3)
+    assert Comment.objects.count() == 0
@@ -1,15 +1,18 @@
 from http import HTTPStatus
 
 import pytest
+from django.urls import reverse
 from pytest_django.asserts import assertRedirects
 
 LOGIN_URL = pytest.lazy_fixture('login_url')  # type: ignore
 LOGOUT_URL = pytest.lazy_fixture('logout_url')  # type: ignore
 SIGNUP_URL = pytest.lazy_fixture('signup_url')  # type: ignore
 DETAIL_URL = pytest.lazy_fixture('news_detail_url')  # type: ignore
+COMMENTS_URL = pytest.lazy_fixture('news_comments_url')  # type: ignore
 EDIT_URL = pytest.lazy_fixture('comment_edit_url')  # type: ignore
 DELETE_URL = pytest.lazy_fixture('comment_delete_url')  # type: ignore
 HOME_URL = pytest.lazy_fixture('news_home_url')  # type: ignore
+SEARCH_URL = pytest.lazy_fixture('news_search_url')  # type: ignore
 
 
 NOT_AUTHOR_CLIENT = pytest.lazy_fixture('not_author_client')  # type: ignore
@@ -17,7 +20,10 @@ ANON_CLIENT = pytest.lazy_fixture('client')  # type: ignore
 AUTHOR_CLIENT = pytest.lazy_fixture('author_client')  # type: ignore
 
 EDIT_DELETE_URLS = (DELETE_URL, EDIT_URL)
-ANON_URLS = (DETAIL_URL, HOME_URL, LOGIN_URL, LOGOUT_URL, SIGNUP_URL)
+ANON_URLS = (
+    DETAIL_URL, COMMENTS_URL, HOME_URL, SEARCH_URL,
+    LOGIN_URL, LOGOUT_URL, SIGNUP_URL,
+)
 
 TEST_STATUS_CODES_DATA = [
     (NOT_AUTHOR_CLIENT, url, HTTPStatus.NOT_FOUND)
@@ -45,3 +51,22 @@ def test_redirects(client, url, login_url):
     expected_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+def test_comments_page_rejects_broken_cursor(client, news_comments_url):
+    response = client.get(news_comments_url, {'cursor': 'не-курсор'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize('url', (HOME_URL, DETAIL_URL))
+def test_read_pages_under_asgi(asgi_get, url):
+    """Главная и страница новости отдаются асинхронными view."""
+    response = asgi_get(url)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_missing_news_under_asgi(asgi_get):
+    url = reverse('news:detail', args=(0,))
+    response = asgi_get(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,166 @@
+import re
+from collections import namedtuple
+from datetime import date
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# Окончания, которые отбрасываются перед поиском по префиксу:
+# так «выборы» находит «выборах» и «выборов».
+ENDING_LETTERS = 'аеёиоуыэюяйь'
+MIN_STEM_LENGTH = 3
+# Служебные символы, которыми snippet() обрамляет совпадения.
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 16
+
+SearchHit = namedtuple(
+    'SearchHit', ('news_id', 'title', 'date', 'kind', 'snippet')
+)
+
+# Ранжирование идёт только по индексам, без соединений с таблицами.
+NEWS_RANKS_SQL = """
+    SELECT 'news' AS kind, rowid, bm25(news_news_fts, 10.0, 1.0) AS rank
+    FROM news_news_fts
+    WHERE news_news_fts MATCH %s {news_filter}
+"""
+COMMENT_RANKS_SQL = """
+    SELECT 'comment' AS kind, rowid, bm25(news_comment_fts) AS rank
+    FROM news_comment_fts
+    WHERE news_comment_fts MATCH %s {comment_filter}
+"""
+NEWS_DATE_FILTER = """
+    AND rowid IN (SELECT news.id FROM news_news AS news WHERE {conditions})
+"""
+COMMENT_DATE_FILTER = """
+    AND rowid IN (
+        SELECT comment.id FROM news_comment AS comment
+        JOIN news_news AS news ON news.id = comment.news_id
+        WHERE {conditions}
+    )
+"""
+# Фрагменты и заголовки читаются только для строк текущей страницы.
+NEWS_SNIPPETS_SQL = f"""
+    SELECT news.id, news.id, news.title, news.date,
+        snippet(news_news_fts, -1, '{MARK_START}', '{MARK_END}', '…',
+                {SNIPPET_TOKENS})
+    FROM news_news_fts
+    JOIN news_news AS news ON news.id = news_news_fts.rowid
+    WHERE news_news_fts MATCH %s AND news_news_fts.rowid IN ({{ids}})
+"""
+COMMENT_SNIPPETS_SQL = f"""
+    SELECT comment.id, news.id, news.title, news.date,
+        snippet(news_comment_fts, 0, '{MARK_START}', '{MARK_END}', '…',
+                {SNIPPET_TOKENS})
+    FROM news_comment_fts
+    JOIN news_comment AS comment ON comment.id = news_comment_fts.rowid
+    JOIN news_news AS news ON news.id = comment.news_id
+    WHERE news_comment_fts MATCH %s AND news_comment_fts.rowid IN ({{ids}})
+"""
+
+
+def stem(word):
+    """Грубая основа слова: до двух букв окончания, не короче трёх букв."""
+    for _ in range(2):
+        if len(word) > MIN_STEM_LENGTH and word[-1] in ENDING_LETTERS:
+            word = word[:-1]
+    return word
+
+
+def build_match_query(query):
+    """Переводит запрос пользователя в безопасный запрос FTS5."""
+    words = re.findall(r'\w+', query.lower())
+    return ' '.join(f'"{stem(word)}"*' for word in words)
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и выделяет совпадения тегом mark."""
+    return mark_safe(
+        escape(snippet).replace(MARK_START, '<mark>').replace(
+            MARK_END, '</mark>'
+        )
+    )
+
+
+class NewsSearchResults:
+    """
+    Выдача поиска по новостям и комментариям к ним.
+
+    Совместима с Paginator: считает совпадения отдельным запросом
+    и читает из индексов только запрошенную страницу.
+    """
+
+    def __init__(self, match, date_from=None, date_to=None):
+        self.match = match
+        conditions, self.date_params = [], []
+        if date_from:
+            conditions.append('news.date >= %s')
+            self.date_params.append(date_from.isoformat())
+        if date_to:
+            conditions.append('news.date <= %s')
+            self.date_params.append(date_to.isoformat())
+        news_filter = comment_filter = ''
+        if conditions:
+            news_filter = NEWS_DATE_FILTER.format(
+                conditions=' AND '.join(conditions)
+            )
+            comment_filter = COMMENT_DATE_FILTER.format(
+                conditions=' AND '.join(conditions)
+            )
+        self.ranks_sql = ' UNION ALL '.join((
+            NEWS_RANKS_SQL.format(news_filter=news_filter),
+            COMMENT_RANKS_SQL.format(comment_filter=comment_filter),
+        ))
+
+    @property
+    def params(self):
+        return [self.match, *self.date_params] * 2
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM ({self.ranks_sql})', self.params
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{self.ranks_sql} ORDER BY rank LIMIT %s OFFSET %s',
+                self.params + [page.stop - page.start, page.start],
+            )
+            ranked = [(kind, rowid) for kind, rowid, _ in cursor.fetchall()]
+            rows = {}
+            for kind, sql in (('news', NEWS_SNIPPETS_SQL),
+                              ('comment', COMMENT_SNIPPETS_SQL)):
+                ids = [rowid for hit_kind, rowid in ranked if hit_kind == kind]
+                if not ids:
+                    continue
+                cursor.execute(
+                    sql.format(ids=', '.join(['%s'] * len(ids))),
+                    [self.match, *ids],
+                )
+                for rowid, *row in cursor.fetchall():
+                    rows[kind, rowid] = row
+        hits = []
+        for key in ranked:
+            if key not in rows:
+                # Строку успели удалить между запросами.
+                continue
+            news_id, title, news_date, snippet = rows[key]
+            hits.append(SearchHit(
+                news_id, title, date.fromisoformat(str(news_date)),
+                key[0], highlight(snippet),
+            ))
+        return hits
+
+
+def search_news(query, date_from=None, date_to=None):
+    """Совпадения в новостях и комментариях, от самых релевантных."""
+    match = build_match_query(query)
+    if not match:
+        return []
+    return NewsSearchResults(match, date_from, date_to)
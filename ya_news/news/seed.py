@@ -0,0 +1,97 @@
+import random
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db.models import Max
+
+from .models import Comment, News
+
+SYLLABLES = (
+    'ва', 'ге', 'до', 'зу', 'ка', 'ле', 'ми', 'но', 'па', 'ре', 'со',
+    'ту', 'фа', 'хе', 'чи', 'шо', 'ры', 'ло', 'ни', 'ст', 'пр', 'кр',
+)
+VOCABULARY_SIZE = 5000
+BATCH_SIZE = 5000
+
+
+def make_vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+VOCABULARY = make_vocabulary(random.Random(0), VOCABULARY_SIZE)
+# Частоты слов убывают по закону Ципфа, как в живом тексте.
+WORD_WEIGHTS = list(
+    accumulate(1 / rank for rank in range(1, VOCABULARY_SIZE + 1))
+)
+
+
+def sentence(rng, length):
+    return ' '.join(
+        rng.choices(VOCABULARY, cum_weights=WORD_WEIGHTS, k=length)
+    ).capitalize()
+
+
+def seed_authors(count):
+    """
+    Авторы seed-author, seed-author-2, ... без пароля для входа.
+
+    Недостающие создаются одним bulk_create, уже существующие берутся
+    из базы, поэтому повторное наполнение их не дублирует.
+    """
+    User = get_user_model()
+    usernames = ['seed-author'] + [
+        f'seed-author-{number}' for number in range(2, count + 1)
+    ]
+    existing = set(User.objects.filter(
+        username__in=usernames
+    ).values_list('username', flat=True))
+    password = make_password(None)
+    User.objects.bulk_create(
+        (
+            User(username=username, password=password)
+            for username in usernames if username not in existing
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return list(User.objects.filter(username__in=usernames).order_by('pk'))
+
+
+def seed_news(news_count, comments_count, seed=0, authors=1):
+    """
+    Создаёт новости и комментарии пачками через bulk_create.
+
+    Комментарии распределяются между authors авторами. Содержимое
+    определяется seed, поэтому наборы повторяемы. Возвращает список id
+    созданных новостей.
+    """
+    rng = random.Random(seed)
+    author_ids = [author.pk for author in seed_authors(authors)]
+    today = date.today()
+    last_id = News.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+    for start in range(0, news_count, BATCH_SIZE):
+        News.objects.bulk_create(
+            News(
+                title=sentence(rng, 4)[:50],
+                text=sentence(rng, 40),
+                date=today - timedelta(days=rng.randrange(3650)),
+            )
+            for _ in range(min(BATCH_SIZE, news_count - start))
+        )
+    seeded = News.objects.filter(pk__gt=last_id)
+    news_ids = list(seeded.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, comments_count, BATCH_SIZE):
+        Comment.objects.bulk_create(
+            Comment(
+                news_id=rng.choice(news_ids),
+                author_id=rng.choice(author_ids),
+                text=sentence(rng, 12),
+            )
+            for _ in range(min(BATCH_SIZE, comments_count - start))
+        )
+    seeded.recount_comments()
+    return news_ids
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from yacommon.auth import invalidate_user
+
+from .feed import refresh_feed
+from .models import Comment, News
+from .page_cache import invalidate_news
+
+
+@receiver((post_save, post_delete), sender=News)
+def news_changed(sender, instance, using, **kwargs):
+    invalidate_news(instance.pk)
+    # Лента собирается по основной базе, записи в другие её не меняют.
+    if using == DEFAULT_DB_ALIAS:
+        refresh_feed()
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate_news(instance.news_id)
+
+
+@receiver((post_save, post_delete), sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
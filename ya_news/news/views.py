@@ -1,47 +1,149 @@
+from asgiref.sync import markcoroutinefunction, sync_to_async
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.views import generic
 
-from .forms import CommentForm
+from .comment_queue import get_queue
+from .feed import latest_news
+from .forms import CommentForm, NewsSearchForm
 from .models import Comment, News
+from .moderation import schedule as schedule_moderation
+from .page_cache import DETAIL_KEY, HOME_KEY, AsyncAnonymousPageCacheMixin
+from .pagination import InvalidCursor, get_comments_page
+from .search import search_news
 
 
-class NewsList(generic.ListView):
+class AsyncView(generic.View):
+    """
+    Представление с асинхронными обработчиками методов.
+
+    В Django 3.2 обработчик запросов узнаёт асинхронное view только
+    по отметке на функции из as_view, поэтому она ставится здесь.
+    Запросы к базе из обработчиков идут через sync_to_async.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return markcoroutinefunction(super().as_view(**initkwargs))
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        return super().http_method_not_allowed(request, *args, **kwargs)
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
+
+
+class NewsList(AsyncAnonymousPageCacheMixin, AsyncView, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    page_cache_key = HOME_KEY
+
+    async def get(self, request, *args, **kwargs):
+        """Новости читаются заранее, шаблон получает готовую выборку."""
+        self.object_list = await sync_to_async(self.get_queryset)()
+        return self.render_to_response(self.get_context_data())
 
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
-        Их количество определяется в настройках проекта.
+        Их количество определяется в настройках проекта, id берутся
+        из готовой ленты, а число комментариев — из денормализованного
+        поля.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return latest_news()
+
+
+class NewsSearch(generic.ListView):
+    """Поиск по новостям и комментариям с фильтром по дате новости."""
+    template_name = 'news/search.html'
 
+    def get_paginate_by(self, queryset):
+        return settings.NEWS_SEARCH_PER_PAGE
 
-class NewsDetail(generic.DetailView):
+    def get_queryset(self):
+        self.form = NewsSearchForm(self.request.GET)
+        if not self.form.is_valid():
+            return []
+        return search_news(
+            self.form.cleaned_data['q'],
+            self.form.cleaned_data['date_from'],
+            self.form.cleaned_data['date_to'],
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.copy()
+        query.pop('page', None)
+        context['form'] = self.form
+        context['query_string'] = query.urlencode()
+        return context
+
+
+class NewsDetail(AsyncView, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+    async def get(self, request, *args, **kwargs):
+        self.object = await sync_to_async(self.get_object)()
+        context = await sync_to_async(self.get_context_data)(
+            object=self.object
         )
-        return obj
+        return self.render_to_response(context)
+
+    def get_object(self, queryset=None):
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
+        """На странице только первая порция комментариев."""
         context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = get_comments_page(
+            self.object
+        )
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsComments(generic.View):
+    """
+    Следующая порция комментариев к новости.
+
+    Отдаёт HTML-фрагмент, а с параметром format=json — JSON
+    с фрагментом и курсором следующей страницы.
+    """
+    template_name = 'news/includes/comments.html'
+
+    def get(self, request, *args, **kwargs):
+        news = get_object_or_404(News, pk=kwargs['pk'])
+        try:
+            comments, next_cursor = get_comments_page(
+                news, request.GET.get('cursor')
+            )
+        except InvalidCursor:
+            return HttpResponseBadRequest()
+        context = {
+            'news': news,
+            'cursor': request.GET.get('cursor'),
+            'comments': comments,
+            'next_cursor': next_cursor,
+        }
+        if request.GET.get('format') != 'json':
+            return render(request, self.template_name, context)
+        return JsonResponse({
+            'html': render_to_string(
+                'news/includes/comment_list.html', context, request
+            ),
+            'next_cursor': next_cursor,
+        })
+
+
 class NewsComment(
         LoginRequiredMixin,
         generic.detail.SingleObjectMixin,
@@ -52,30 +154,52 @@ class NewsComment(
     template_name = 'news/detail.html'
 
     def post(self, request, *args, **kwargs):
+        """Новость читается один раз и дальше берётся из self.object."""
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        """При ошибке в форме страница новости выводится целиком."""
+        context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = get_comments_page(
+            self.object
+        )
+        return context
+
     def form_valid(self, form):
+        queue = get_queue()
+        if queue is not None:
+            # Комментарий появится после разбора очереди drain_comments.
+            queue.put(
+                self.object.pk, self.request.user.pk,
+                form.cleaned_data['text'],
+            )
+            return super().form_valid(form)
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            self.model.objects.filter(pk=self.object.pk).add_comments(1)
+            schedule_moderation(comment.pk)
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
-class NewsDetailView(generic.View):
+class NewsDetailView(AsyncAnonymousPageCacheMixin, AsyncView):
+    page_cache_key = DETAIL_KEY
 
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        return await view(request, *args, **kwargs)
 
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         view = NewsComment.as_view()
-        return view(request, *args, **kwargs)
+        return await sync_to_async(view)(request, *args, **kwargs)
 
 
 class CommentBase(LoginRequiredMixin):
@@ -83,14 +207,21 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Комментарий уже загружен во view, новость не запрашиваем."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Новость подгружается тем же запросом: её заголовок
+        выводится на страницах правки и удаления.
+        """
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -98,7 +229,20 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def form_valid(self, form):
+        with transaction.atomic():
+            response = super().form_valid(form)
+            News.objects.filter(pk=self.object.news_id).bump_version()
+            schedule_moderation(self.object.pk)
+        return response
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        with transaction.atomic():
+            response = super().delete(request, *args, **kwargs)
+            News.objects.filter(pk=self.object.news_id).add_comments(-1)
+        return response
@@ -1,9 +1,16 @@
+import os
+import sys
+import tempfile
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий для yanews и yanote код лежит в пакете yacommon в корне
+# репозитория.
+sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
 
 DEBUG = True
@@ -22,10 +29,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'yacommon.query_budget.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yacommon.routers.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -43,6 +52,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'news.context_processors.fragment_cache',
             ],
         },
     },
@@ -51,13 +61,135 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
-DATABASES = {
+DATABASE_PROFILES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # WAL, synchronous=NORMAL, mmap, busy_timeout, BEGIN IMMEDIATE
+    # и постоянные соединения для конкурентной записи.
+    'tuned': {
+        'ENGINE': 'yacommon.sqlite_backend',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+    },
+}
+
+DATABASES = {
+    'default': {
+        **DATABASE_PROFILES[os.environ.get('YANEWS_DB_PROFILE', 'default')],
+        # Файл тестовой базы, по умолчанию она в памяти. Параллельный
+        # прогон даёт каждому процессу копию мигрированного шаблона.
+        'TEST': {'NAME': os.environ.get('YANEWS_TEST_DB')},
+    },
+}
+
+
+# Сброс страниц при записи должен дойти до всех процессов сервера,
+# поэтому по умолчанию кэш файловый, общий для процессов на одной
+# машине. locmem годится только для сервера из одного процесса.
+PAGE_CACHE_BACKENDS = {
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'yanews-pages',
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'news-pages',
+    },
+    # Без кэша страниц: для замеров работы самих view.
+    'off': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    # Требует пакета django-redis и запущенного Redis.
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get(
+            'YANEWS_REDIS_URL', 'redis://127.0.0.1:6379/1'
+        ),
+    },
 }
 
+SESSION_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'news-sessions',
+    },
+    # Общий для нескольких процессов сервера на одной машине.
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'yanews-sessions',
+    },
+}
+
+# Данные, которые должны совпадать во всех процессах сервера: запись
+# в одном процессе сразу видна остальным. locmem годится только для
+# сервера из одного процесса.
+SHARED_CACHE_BACKENDS = {
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'yanews-shared',
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'news-shared',
+    },
+    # Требует пакета django-redis и запущенного Redis.
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get(
+            'YANEWS_REDIS_URL', 'redis://127.0.0.1:6379/1'
+        ),
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': PAGE_CACHE_BACKENDS[os.environ.get('YANEWS_PAGE_CACHE', 'file')],
+    'sessions': SESSION_CACHE_BACKENDS[os.environ.get('YANEWS_SESSION_CACHE', 'locmem')],
+    'shared': SHARED_CACHE_BACKENDS[os.environ.get('YANEWS_SHARED_CACHE', 'file')],
+}
+
+# Хранилище сессий: db читает django_session в каждом запросе
+# авторизованного пользователя, cached_db сначала смотрит в кэш
+# sessions, signed_cookies держит сессию в подписанной cookie и не
+# обращается к серверу: подходит читателям новостей, у которых
+# в сессии только отметка о входе.
+# Неизменённая сессия не пересохраняется, см. yacommon.sessions.
+SESSION_ENGINES = {
+    'db': 'yacommon.sessions.db',
+    'cached_db': 'yacommon.sessions.cached_db',
+    'signed_cookies': 'yacommon.sessions.signed_cookies',
+}
+
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('YANEWS_SESSIONS', 'db')]
+
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Реплики только для чтения — пути к файлам SQLite через запятую.
+# Локально их заменяют копии основной базы, см. sync_replicas.
+for index, replica_name in enumerate(
+        filter(None, os.environ.get('YANEWS_REPLICAS', '').split(','))
+):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'NAME': replica_name,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['yacommon.routers.ReplicaRouter']
+
+REPLICA_READ_VIEWS = ('news:home', 'news:detail')
+
+REPLICA_STICKY_SECONDS = 15
+
+# Анонимные страницы кэшируются целиком, поэтому читают основную базу.
+REPLICA_ANONYMOUS_READS = False
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -76,7 +208,82 @@ STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+AUTHENTICATION_BACKENDS = ['yacommon.auth.CachedModelBackend']
+
+# Пользователи кэшируются в общем кэше: смена пароля или блокировка
+# сразу видна всем процессам сервера.
+AUTH_USER_CACHE_ALIAS = 'shared'
+
+AUTH_USER_CACHE_TIMEOUT = 60
+
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_PER_PAGE = 50
+
+NEWS_SEARCH_PER_PAGE = 20
+
+NEWS_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+NEWS_PAGE_CACHE_ALIAS = 'pages'
+
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Лента главной живёт в общем кэше и пересобирается при записи.
+NEWS_FEED_CACHE_ALIAS = 'shared'
+
+NEWS_FEED_TIMEOUT = 60 * 60 * 24
+
+NEWS_BAD_WORDS_FILE = None
+
+# Путь к журналу комментариев с отложенной записью; None — писать сразу.
+NEWS_COMMENT_QUEUE = os.environ.get('YANEWS_COMMENT_QUEUE')
+
+NEWS_COMMENT_QUEUE_BATCH_SIZE = 500
+
+NEWS_COMMENT_QUEUE_LEASE_SECONDS = 60
+
+# Стадии модерации: быстрые — в форме, отложенные — после сохранения.
+NEWS_MODERATION_STAGES = (
+    'news.moderation.word_filter',
+    'news.moderation.link_filter',
+    'news.moderation.spam_filter',
+)
+
+NEWS_MODERATION_DEFERRED_STAGES = (
+    'news.moderation.duplicate_filter',
+)
+
+# Вердикты и счётчики повторов общие для всех процессов сервера.
+NEWS_MODERATION_CACHE_ALIAS = 'shared'
+
+NEWS_MODERATION_WORKERS = 2
+
+NEWS_MODERATION_VERDICT_TIMEOUT = 60 * 60
+
+NEWS_MODERATION_MAX_LINKS = 2
+
+NEWS_MODERATION_DUPLICATE_LIMIT = 3
+
+NEWS_MODERATION_DUPLICATE_WINDOW = 60 * 10
+
+NEWS_MODERATION_DUPLICATE_MIN_LENGTH = 20
+
+# Наибольшее число SQL-запросов на страницу по имени URL.
+QUERY_BUDGETS = {
+    'news:home': 3,
+    'news:search': 6,
+    'news:detail': 7,
+    'news:comments': 4,
+    'news:edit': 7,
+    'news:delete': 7,
+}
+
+QUERY_BUDGET_RAISE = DEBUG
+
+QUERY_BUDGET_N_PLUS_ONE_THRESHOLD = 5
+
+# Страницы, где повторы одного чтения ожидаемы.
+QUERY_BUDGET_N_PLUS_ONE_EXEMPT = ()
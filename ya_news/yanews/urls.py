@@ -4,8 +4,11 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from yacommon.query_budget import query_stats
+
 urlpatterns = [
     path('', include('news.urls')),
+    path('admin/query-stats/', query_stats, name='query_stats'),
     path('admin/', admin.site.urls),
 ]
 
@@ -0,0 +1,110 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .models import Note
+from .slugs import allocate_slugs
+
+EXPORT_FIELDS = ('title', 'text', 'slug')
+
+
+class InvalidLine(ValueError):
+    """Строка JSON Lines не описывает заметку."""
+
+    def __init__(self, number, reason=None):
+        message = f'Некорректная заметка в строке {number}'
+        super().__init__(f'{message}: {reason}' if reason else message)
+        self.number = number
+
+
+def export_lines(queryset, chunk_size):
+    """Заметки в формате JSON Lines, по одной строке на заметку."""
+    for note in queryset.values(*EXPORT_FIELDS).iterator(chunk_size):
+        yield json.dumps(note, ensure_ascii=False) + '\n'
+
+
+def parse_line(number, line):
+    """
+    Заметка из строки JSON Lines, проверенная валидаторами модели.
+
+    Автор назначается при сохранении, а уникальность slug проверяет
+    create_batch для всей пачки сразу, поэтому здесь они пропускаются.
+    """
+    try:
+        data = json.loads(line)
+    except ValueError:
+        raise InvalidLine(number)
+    if not isinstance(data, dict):
+        raise InvalidLine(number)
+    title, text = data.get('title'), data.get('text')
+    slug = data.get('slug') or ''
+    if not all(isinstance(value, str) for value in (title, text, slug)):
+        raise InvalidLine(number)
+    note = Note(title=title, text=text, slug=slug)
+    try:
+        note.full_clean(exclude=('author',), validate_unique=False)
+    except ValidationError as error:
+        raise InvalidLine(number, '; '.join(
+            f'{field}: {" ".join(messages)}'
+            for field, messages in error.message_dict.items()
+        ))
+    return note
+
+
+def create_batch(numbered_notes, author):
+    """
+    Сохраняет пачку заметок одним bulk_create.
+
+    Slug для всей пачки подбираются одним запросом. Свободный slug
+    из файла сохраняется как есть, занятый получает свободный номер.
+    Если параллельный запрос успел занять один из подобранных slug,
+    ошибка сообщает номер строки с этим slug.
+    """
+    notes = [note for _, note in numbered_notes]
+    max_slug_length = Note._meta.get_field('slug').max_length
+    slugs = allocate_slugs(
+        Note.objects.all(),
+        [note.title for note in notes],
+        max_slug_length,
+        [note.slug for note in notes],
+    )
+    for note, slug in zip(notes, slugs):
+        note.slug = slug
+        note.author = author
+    try:
+        with transaction.atomic():
+            return len(Note.objects.bulk_create(notes))
+    except IntegrityError:
+        taken = set(Note.objects.filter(
+            slug__in=slugs
+        ).values_list('slug', flat=True))
+        number, note = next(
+            ((number, note) for number, note in numbered_notes
+             if note.slug in taken),
+            numbered_notes[0],
+        )
+        raise InvalidLine(number, f'slug {note.slug} уже занят')
+
+
+def import_lines(lines, author, batch_size):
+    """
+    Импортирует заметки из строк JSON Lines пачками по batch_size.
+
+    Импорт атомарен: при ошибке в любой строке не сохраняется ничего.
+    Возвращает количество созданных заметок.
+    """
+    created, batch = 0, []
+    with transaction.atomic():
+        for number, line in enumerate(lines, start=1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            if not line.strip():
+                continue
+            batch.append((number, parse_line(number, line)))
+            if len(batch) == batch_size:
+                created += create_batch(batch, author)
+                batch = []
+        if batch:
+            created += create_batch(batch, author)
+    return created
@@ -0,0 +1,32 @@
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+
+LIST_VERSION_KEY = 'notes:list-version:{author_id}'
+
+
+def list_cache():
+    return caches[settings.NOTES_LIST_CACHE_ALIAS]
+
+
+def get_list_version(author_id):
+    """
+    Версия закэшированного списка заметок автора.
+
+    Начальное значение берётся из времени, чтобы после вытеснения
+    ключа из кэша старые фрагменты не стали снова актуальными.
+    """
+    return list_cache().get_or_set(
+        LIST_VERSION_KEY.format(author_id=author_id), time_ns, None
+    )
+
+
+def invalidate_list(author_id):
+    """Делает устаревшими все закэшированные страницы списка автора."""
+    key = LIST_VERSION_KEY.format(author_id=author_id)
+    cache = list_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time_ns(), None)
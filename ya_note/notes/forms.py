@@ -1,6 +1,5 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from pytils.translit import slugify
 
 from .models import Note
 
@@ -15,14 +14,23 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
+        """
+        Обрабатывает случай, если указанный slug не уникален.
+
+        Пустой slug не проверяем: свободное значение
+        подберёт Note.save при сохранении.
+        """
+        slug = self.cleaned_data.get('slug')
+        if slug and Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+    def validate_unique(self):
+        """
+        Уникальность slug уже проверена в clean_slug.
+
+        Других уникальных полей, кроме первичного ключа, у заметки нет,
+        поэтому проверка модели только повторила бы тот же запрос.
+        """
@@ -0,0 +1,133 @@
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+from notes import urls
+from notes.models import Note
+from notes.seed import WORDS, seed_notes
+from yacommon.benchmarks import (Page, compare_results, make_client,
+                                 make_results, measure_page, read_results,
+                                 uncovered, write_results)
+
+SIZES = (1_000, 100_000, 1_000_000)
+USERS = 100
+IMPORT_BODY = '\n'.join(
+    f'{{"title": "Импорт {number}", "text": "Текст"}}'
+    for number in range(10)
+)
+
+
+def note_pages(slug):
+    """Замер для каждой страницы из notes/urls.py."""
+    return {
+        'notes:home': Page('get', reverse('notes:home'), authorized=False),
+        'notes:list': Page('get', reverse('notes:list')),
+        'notes:search': Page('get', reverse('notes:search'), {'q': WORDS[0]}),
+        'notes:success': Page('get', reverse('notes:success')),
+        'notes:detail': Page('get', reverse('notes:detail', args=(slug,))),
+        'notes:add': Page('get', reverse('notes:add')),
+        'notes:edit': Page('get', reverse('notes:edit', args=(slug,))),
+        'notes:delete': Page('get', reverse('notes:delete', args=(slug,))),
+        'notes:export': Page('get', reverse('notes:export')),
+        'notes:import': Page(
+            'post', reverse('notes:import'), IMPORT_BODY,
+            extra={'content_type': 'application/x-ndjson'},
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Для каждого размера из --sizes наполняет временную базу через '
+        'seed_notes и замеряет каждую страницу notes/urls.py: медиану и '
+        'p99 задержки, число запросов к базе и пик памяти. Результаты '
+        'пишутся в JSON, --compare сравнивает их с прошлым прогоном.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                            help='Число заметок в базе')
+        parser.add_argument('--users', type=int, default=USERS)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='bench_urls.json')
+        parser.add_argument('--compare', help='JSON прошлого прогона')
+
+    def handle(self, *args, **options):
+        missing = uncovered(
+            urls.urlpatterns, urls.app_name, note_pages('slug')
+        )
+        if missing:
+            raise CommandError(f'Нет замера для страниц: {", ".join(missing)}')
+        baseline = None
+        if options['compare']:
+            baseline = read_results(options['compare'])
+        database = connections['default'].settings_dict['NAME']
+        sizes = {}
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                for size in options['sizes']:
+                    sizes[str(size)] = self.bench(
+                        Path(directory) / f'{size}.sqlite3', size, options
+                    )
+            finally:
+                connections.close_all()
+                connections['default'].settings_dict['NAME'] = database
+        results = make_results('ya_note', sizes)
+        write_results(options['output'], results)
+        self.stdout.write(f'Результаты записаны в {options["output"]}')
+        if baseline is not None:
+            self.report_changes(baseline, results)
+
+    def bench(self, path, size, options):
+        connections.close_all()
+        connections['default'].settings_dict['NAME'] = str(path)
+        for cache in caches.all():
+            cache.clear()
+        call_command('migrate', verbosity=0)
+        started = perf_counter()
+        author, *_ = seed_notes(size, options['users'], options['seed'])
+        self.stdout.write(
+            f'\nЗаметок: {size}, наполнение {perf_counter() - started:.1f} с'
+        )
+        note = Note.objects.filter(author=author).order_by('pk').first()
+        if note is None:
+            raise CommandError('Для замера нужна хотя бы одна заметка')
+        clients = {False: make_client(), True: make_client(author)}
+        self.stdout.write(
+            f'{"страница":<16} {"p50, мс":>8} {"p99, мс":>8}'
+            f' {"запросов":>8} {"память, КБ":>11}'
+        )
+        results = {}
+        for name, page in note_pages(note.slug).items():
+            metrics = measure_page(
+                clients[page.authorized], page, options['repeat']
+            )
+            if metrics['status'] >= 400:
+                raise CommandError(f'{name}: ответ {metrics["status"]}')
+            results[name] = metrics
+            self.stdout.write(
+                f'{name:<16} {metrics["p50_ms"]:>8.2f}'
+                f' {metrics["p99_ms"]:>8.2f} {metrics["queries"]:>8}'
+                f' {metrics["peak_kb"]:>11.1f}'
+            )
+        return results
+
+    def report_changes(self, baseline, results):
+        self.stdout.write(
+            f'\n{"размер":>9} {"страница":<16} {"метрика":<8}'
+            f' {"было":>10} {"стало":>10} {"отношение":>9}'
+        )
+        for size, name, metric, old, new, ratio in compare_results(
+            baseline, results
+        ):
+            change = f'{ratio:.2f}' if ratio is not None else '—'
+            self.stdout.write(
+                f'{size:>9} {name:<16} {metric:<8}'
+                f' {old:>10} {new:>10} {change:>9}'
+            )
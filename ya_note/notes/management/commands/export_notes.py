@@ -0,0 +1,37 @@
+import sys
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.bulk import export_lines
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки пользователя в формате JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки, по умолчанию stdout'
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден'
+            )
+        lines = export_lines(
+            Note.objects.filter(author=author).order_by('id'),
+            settings.NOTES_EXPORT_CHUNK_SIZE,
+        )
+        if options['output'] == '-':
+            sys.stdout.writelines(lines)
+            return
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            file.writelines(lines)
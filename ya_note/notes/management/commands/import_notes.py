@@ -0,0 +1,44 @@
+import sys
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.bulk import InvalidLine, import_lines
+from notes.cache import invalidate_list
+
+
+class Command(BaseCommand):
+    help = 'Загружает заметки пользователя из файла JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            'path', help='Файл с заметками, "-" для чтения из stdin'
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.NOTES_IMPORT_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден'
+            )
+        if options['path'] == '-':
+            created = self.load(sys.stdin, author, options['batch_size'])
+        else:
+            with open(options['path'], encoding='utf-8') as file:
+                created = self.load(file, author, options['batch_size'])
+        invalidate_list(author.pk)
+        self.stdout.write(self.style.SUCCESS(f'Создано заметок: {created}'))
+
+    def load(self, lines, author, batch_size):
+        try:
+            return import_lines(lines, author, batch_size)
+        except InvalidLine as error:
+            raise CommandError(error)
@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик из DATABASE_REPLICAS: '
+        'локальная замена репликации для проверки чтения с реплик'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены')
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('Копирование поддерживается только для SQLite')
+        source = sqlite3.connect(primary.settings_dict['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                connections[alias].close()
+                target = sqlite3.connect(
+                    connections[alias].settings_dict['NAME']
+                )
+                with target:
+                    source.backup(target)
+                target.close()
+                self.stdout.write(f'{alias}: скопирована')
+        finally:
+            source.close()
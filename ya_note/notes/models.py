@@ -1,6 +1,9 @@
 from django.conf import settings
-from django.db import models
-from pytils.translit import slugify
+from django.db import IntegrityError, models, transaction
+
+from .slugs import allocate_slugs
+
+SLUG_ATTEMPTS = 3
 
 
 class Note(models.Model):
@@ -27,11 +30,30 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Пустой slug подбирается по заголовку.
+
+        Если параллельный запрос успел занять тот же slug,
+        сохранение повторяется со следующим свободным номером.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        others = type(self).objects.exclude(pk=self.pk)
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            self.slug, = allocate_slugs(others, [self.title], max_slug_length)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS:
+                    raise
@@ -0,0 +1,79 @@
+import re
+
+from django.db import connection
+
+from .models import Note
+
+# Окончания, которые отбрасываются перед поиском по префиксу:
+# так «заметки» находит «заметка» и «заметку».
+ENDING_LETTERS = 'аеёиоуыэюяйь'
+MIN_STEM_LENGTH = 3
+# Совпадение в заголовке весит больше совпадения в тексте.
+RANK = 'bm25(notes_note_fts, 10.0, 1.0)'
+
+
+def stem(word):
+    """Грубая основа слова: до двух букв окончания, не короче трёх букв."""
+    for _ in range(2):
+        if len(word) > MIN_STEM_LENGTH and word[-1] in ENDING_LETTERS:
+            word = word[:-1]
+    return word
+
+
+def build_match_query(query):
+    """Переводит запрос пользователя в безопасный запрос FTS5."""
+    words = re.findall(r'\w+', query.lower())
+    return ' '.join(f'"{stem(word)}"*' for word in words)
+
+
+class NoteSearchResults:
+    """
+    Ранжированная выдача полнотекстового поиска по заметкам автора.
+
+    Совместима с Paginator: считает совпадения отдельным запросом
+    и читает из индекса только запрошенную страницу.
+    """
+
+    def __init__(self, author, match):
+        self.author = author
+        self.match = match
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT COUNT(*) FROM notes_note_fts '
+                'JOIN notes_note ON notes_note.id = notes_note_fts.rowid '
+                'WHERE notes_note_fts MATCH %s AND notes_note.author_id = %s',
+                [self.match, self.author.pk],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        return list(Note.objects.raw(
+            'SELECT notes_note.id, notes_note.title, notes_note.slug '
+            'FROM notes_note_fts '
+            'JOIN notes_note ON notes_note.id = notes_note_fts.rowid '
+            'WHERE notes_note_fts MATCH %s AND notes_note.author_id = %s '
+            f'ORDER BY {RANK} LIMIT %s OFFSET %s',
+            [self.match, self.author.pk,
+             page.stop - page.start, page.start],
+        ))
+
+
+def search_notes(author, query):
+    """Заметки автора, подходящие под запрос, от самых релевантных."""
+    match = build_match_query(query)
+    if not match:
+        return []
+    return NoteSearchResults(author, match)
+
+
+def rebuild_index():
+    """Перестраивает индекс по текущему содержимому notes_note."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')"
+        )
@@ -0,0 +1,73 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db.models import Max
+
+from .models import Note
+
+WORDS = (
+    'купить', 'молоко', 'хлеб', 'позвонить', 'маме', 'встреча', 'проект',
+    'отчёт', 'сдать', 'до', 'пятницы', 'идея', 'для', 'статьи', 'книга',
+    'прочитать', 'список', 'дел', 'на', 'неделю', 'врач', 'запись',
+    'оплатить', 'счёт', 'подарок', 'другу', 'план', 'отпуска', 'билеты',
+    'поезд', 'рецепт', 'пирога', 'задача', 'по', 'работе', 'заметка',
+    'вопрос', 'к', 'созвону', 'пароль', 'от', 'роутера', 'спорт', 'утром',
+)
+BATCH_SIZE = 5000
+
+
+def phrase(rng, length):
+    return ' '.join(rng.choices(WORDS, k=length)).capitalize()
+
+
+def seed_users(count):
+    """
+    Пользователи seed-user, seed-user-2, ... без пароля для входа.
+
+    Недостающие создаются одним bulk_create, уже существующие берутся
+    из базы, поэтому повторное наполнение их не дублирует.
+    """
+    User = get_user_model()
+    usernames = ['seed-user'] + [
+        f'seed-user-{number}' for number in range(2, count + 1)
+    ]
+    existing = set(User.objects.filter(
+        username__in=usernames
+    ).values_list('username', flat=True))
+    password = make_password(None)
+    User.objects.bulk_create(
+        (
+            User(username=username, password=password)
+            for username in usernames if username not in existing
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return list(User.objects.filter(username__in=usernames).order_by('pk'))
+
+
+def seed_notes(notes_count, users_count=1, seed=0):
+    """
+    Создаёт заметки пачками через bulk_create.
+
+    Заметки распределяются между users_count авторами. Slug имеют вид
+    seed-<номер>, номера продолжают id последней заметки, поэтому
+    свободные slug не нужно подбирать запросом. Содержимое определяется
+    seed, поэтому наборы повторяемы. Возвращает список авторов.
+    """
+    rng = random.Random(seed)
+    authors = seed_users(users_count)
+    last_id = Note.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+    for start in range(0, notes_count, BATCH_SIZE):
+        Note.objects.bulk_create(
+            Note(
+                title=phrase(rng, rng.randint(2, 6))[:100],
+                text=phrase(rng, rng.randint(10, 80)),
+                slug=f'seed-{last_id + number}',
+                author=rng.choice(authors),
+            )
+            for number in range(
+                start + 1, min(start + BATCH_SIZE, notes_count) + 1
+            )
+        )
+    return authors
@@ -0,0 +1,10 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from yacommon.auth import invalidate_user
+
+
+@receiver((post_save, post_delete), sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
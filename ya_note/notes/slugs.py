@@ -0,0 +1,46 @@
+from functools import lru_cache
+
+from django.db.models import Q
+from pytils.translit import slugify
+
+# Дефис и до девяти цифр номера: slug-2, slug-3, ...
+SUFFIX_MAX_LENGTH = 10
+DEFAULT_SLUG = 'note'
+# Верхняя граница диапазона строк с общим префиксом.
+PREFIX_END = '\U0010ffff'
+
+
+@lru_cache(maxsize=4096)
+def transliterate(title):
+    """Транслитерация заголовка, повторяющиеся заголовки берутся из кэша."""
+    return slugify(title)
+
+
+def allocate_slugs(queryset, titles, max_length, slugs=None):
+    """
+    Подбирает свободные slug для списка заголовков.
+
+    Непустой slug из slugs, указанный вместо заголовка на той же
+    позиции, берётся как есть, без транслитерации. Занятые значения
+    читаются одним запросом по диапазонам общих префиксов: в отличие
+    от LIKE, диапазон ищется по уникальному индексу slug. При
+    совпадении к slug добавляется следующий свободный номер.
+    """
+    bases = [
+        slug or transliterate(title)[:max_length] or DEFAULT_SLUG
+        for title, slug in zip(titles, slugs or [''] * len(titles))
+    ]
+    prefixes = Q()
+    for prefix in {base[:max_length - SUFFIX_MAX_LENGTH] for base in bases}:
+        prefixes |= Q(slug__gte=prefix, slug__lt=prefix + PREFIX_END)
+    taken = set(queryset.filter(prefixes).values_list('slug', flat=True))
+    allocated = []
+    for base in bases:
+        slug, number = base, 1
+        while slug in taken:
+            number += 1
+            suffix = f'-{number}'
+            slug = base[:max_length - len(suffix)] + suffix
+        taken.add(slug)
+        allocated.append(slug)
+    return allocated
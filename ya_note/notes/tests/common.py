@@ -1,17 +1,24 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache, caches
+from django.db.models import Max
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from notes.models import Note
+from notes.slugs import transliterate
+from yacommon.testing import FAST_LOGIN_SETTINGS, SHARED_CACHE, fast_login
 
 User = get_user_model()
 
 URLS = {
     "notes_list": reverse("notes:list"),
+    "notes_search": reverse("notes:search"),
     "notes_add": reverse("notes:add"),
     "notes_edit": lambda slug: reverse("notes:edit", args=(slug,)),
     "notes_delete": lambda slug: reverse("notes:delete", args=(slug,)),
     "notes_detail": lambda slug: reverse("notes:detail", args=(slug,)),
     "notes_success": reverse("notes:success"),
+    "notes_export": reverse("notes:export"),
+    "notes_import": reverse("notes:import"),
     "users_login": reverse("users:login"),
     "notes_home": reverse("notes:home"),
     "users_logout": reverse("users:logout"),
@@ -19,21 +26,35 @@ URLS = {
 }
 
 
+def next_id(model):
+    """
+    Первый свободный id после наибольшего в таблице.
+
+    bulk_create в SQLite не возвращает id, поэтому они задаются заранее.
+    """
+    return (model.objects.aggregate(last_id=Max("pk"))["last_id"] or 0) + 1
+
+
+@override_settings(QUERY_BUDGET_RAISE=True, **FAST_LOGIN_SETTINGS)
 class BaseTestCase(TestCase):
     @classmethod
     def setUpTestData(cls):
-        cls.author = User.objects.create(username='Author')
-        cls.author_client = Client()
-        cls.author_client.force_login(cls.author)
-
-        cls.not_author = User.objects.create(username='Not author')
-        cls.not_author_client = Client()
-        cls.not_author_client.force_login(cls.not_author)
-        cls.note = Note.objects.create(
+        # Строки пишутся одним bulk_create на модель, а не create()
+        # на каждую: slug заметки задан сразу, без подбора запросом.
+        user_id = next_id(User)
+        cls.author, cls.not_author = User.objects.bulk_create((
+            User(pk=user_id, username='Author'),
+            User(pk=user_id + 1, username='Not author'),
+        ))
+        cls.author_client = fast_login(Client(), cls.author)
+        cls.not_author_client = fast_login(Client(), cls.not_author)
+        cls.note, = Note.objects.bulk_create((Note(
+            pk=next_id(Note),
             title="Заголовок",
             text="Текст",
+            slug=transliterate("Заголовок"),
             author=cls.author,
-        )
+        ),))
         cls.detail_url = URLS["notes_detail"](cls.note.slug)
         cls.edit_url = URLS["notes_edit"](cls.note.slug)
         cls.delete_url = URLS["notes_delete"](cls.note.slug)
@@ -49,3 +70,7 @@ class BaseTestCase(TestCase):
             "text": "Новый текст",
             "slug": "new-slug"
         }
+
+    def setUp(self):
+        cache.clear()
+        caches[SHARED_CACHE].clear()
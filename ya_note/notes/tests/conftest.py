@@ -0,0 +1,34 @@
+from statistics import median
+from time import perf_counter
+
+import pytest
+
+SETUP_TIMINGS = pytest.StashKey()
+
+
+def pytest_configure(config):
+    config.stash[SETUP_TIMINGS] = []
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    started = perf_counter()
+    yield
+    item.config.stash[SETUP_TIMINGS].append(
+        (perf_counter() - started, item.nodeid)
+    )
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Сколько стоит подготовка данных одного теста."""
+    timings = config.stash.get(SETUP_TIMINGS, None)
+    if not timings:
+        return
+    total = sum(seconds for seconds, _ in timings)
+    slowest, node_id = max(timings)
+    terminalreporter.write_sep("-", "подготовка тестов")
+    terminalreporter.write_line(
+        f"тестов: {len(timings)}, всего {total:.2f} с, "
+        f"медиана {median(seconds for seconds, _ in timings) * 1000:.1f} мс, "
+        f"дольше всего {slowest * 1000:.1f} мс: {node_id}"
+    )
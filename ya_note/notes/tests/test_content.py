@@ -1,5 +1,10 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import override_settings
+from notes.cache import LIST_VERSION_KEY
 from notes.forms import NoteForm
+from notes.models import Note
+from yacommon.testing import SHARED_CACHE
 
 from .common import URLS, BaseTestCase
 
@@ -35,3 +40,82 @@ class TestRoutes(BaseTestCase):
                 response = self.author_client.get(url)
                 form = response.context['form']
                 self.assertIsInstance(form, NoteForm)
+
+    @override_settings(NOTES_PER_PAGE=2)
+    def test_notes_list_is_paginated(self):
+        """Список заметок выводится постранично, без текста заметок."""
+        Note.objects.bulk_create(
+            Note(title=f"Заметка {index}", text="Текст",
+                 slug=f"note-{index}", author=self.author)
+            for index in range(3)
+        )
+        response = self.author_client.get(URLS["notes_list"])
+        object_list = response.context["object_list"]
+        self.assertEqual(len(object_list), 2)
+        self.assertEqual(object_list[0], self.note)
+        self.assertEqual(
+            object_list[0].get_deferred_fields(), {"text", "author_id"}
+        )
+        response = self.author_client.get(URLS["notes_list"], {"page": 2})
+        self.assertEqual(len(response.context["object_list"]), 2)
+
+    def test_notes_list_cache_invalidated_on_change(self):
+        """Закэшированный список обновляется после изменения заметок."""
+        self.author_client.get(URLS["notes_list"])
+        self.author_client.post(URLS["notes_add"], data=self.data)
+        response = self.author_client.get(URLS["notes_list"])
+        self.assertContains(response, self.data["title"])
+        self.author_client.post(URLS["notes_delete"](self.data["slug"]))
+        response = self.author_client.get(URLS["notes_list"])
+        self.assertNotContains(response, self.data["title"])
+
+    def test_notes_list_version_shared_between_processes(self):
+        """
+        Новую версию списка, записанную другим процессом через своё
+        подключение к кэшу, видит и этот процесс.
+        """
+        self.author_client.get(URLS["notes_list"])
+        Note.objects.bulk_create((Note(
+            title=self.data["title"], text=self.data["text"],
+            slug=self.data["slug"], author=self.author,
+        ),))
+        other_process_cache = caches.create_connection(SHARED_CACHE)
+        other_process_cache.incr(
+            LIST_VERSION_KEY.format(author_id=self.author.pk)
+        )
+        response = self.author_client.get(URLS["notes_list"])
+        self.assertContains(response, self.data["title"])
+
+    def search(self, client, query):
+        response = client.get(URLS["notes_search"], {"q": query})
+        return [note.title for note in response.context["object_list"]]
+
+    def test_search_finds_word_forms_ranked_by_title(self):
+        """
+        Поиск находит другие формы слова, совпадения в заголовке
+        выше совпадений в тексте, чужие заметки не попадают в выдачу.
+        """
+        Note.objects.bulk_create((
+            Note(title="Рецепты", text="Заметка про пироги",
+                 slug="recipes", author=self.author),
+            Note(title="Заметки о поездке", text="Море",
+                 slug="trip", author=self.author),
+            Note(title="Чужие заметки", text="Секрет",
+                 slug="secret", author=self.not_author),
+        ))
+        self.assertEqual(
+            self.search(self.author_client, "заметку"),
+            ["Заметки о поездке", "Рецепты"],
+        )
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении заметки."""
+        self.assertEqual(self.search(self.author_client, "текст"),
+                         [self.note.title])
+        self.note.text = "Пирог"
+        self.note.save()
+        self.assertEqual(self.search(self.author_client, "текст"), [])
+        self.assertEqual(self.search(self.author_client, "пироги"),
+                         [self.note.title])
+        self.note.delete()
+        self.assertEqual(self.search(self.author_client, "пироги"), [])
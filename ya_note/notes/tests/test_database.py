@@ -0,0 +1,129 @@
+import tempfile
+from importlib import import_module
+from itertools import product
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.db import connection, connections
+from django.db.utils import load_backend
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from notes.models import Note
+from yacommon.auth import USER_KEY, user_cache
+from yacommon.routers import STICKY_COOKIE, ReplicaMiddleware, ReplicaRouter
+
+from .common import URLS, BaseTestCase
+
+
+class TestTunedBackend(TestCase):
+
+    def test_pragmas_applied(self):
+        """Новое соединение получает WAL и остальные PRAGMA профиля."""
+        backend = load_backend("yacommon.sqlite_backend")
+        with tempfile.TemporaryDirectory() as directory:
+            connection = backend.DatabaseWrapper({
+                **connections.settings["default"],
+                "NAME": str(Path(directory) / "tuned.sqlite3"),
+            }, alias="tuned")
+            try:
+                with connection.cursor() as cursor:
+                    pragmas = {
+                        name: cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                        for name in ("journal_mode", "synchronous",
+                                     "busy_timeout")
+                    }
+            finally:
+                connection.close()
+        self.assertEqual(pragmas, {
+            "journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000
+        })
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class TestReplicaRouting(BaseTestCase):
+
+    def route(self, request):
+        """База, которую роутер выбрал бы для чтения во время запроса."""
+        request.user = self.author
+        request.resolver_match = resolve(request.path)
+        routed = []
+
+        def view(request):
+            middleware.process_view(request, None, (), {})
+            routed.append(ReplicaRouter().db_for_read(Note))
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(view)
+        middleware(request)
+        return routed[0]
+
+    def test_reads_of_marked_pages_go_to_replica(self):
+        factory = RequestFactory()
+        cases = (
+            (factory.get(self.notes_list_url), "replica"),
+            (factory.get(self.detail_url), "replica"),
+            (factory.get(self.edit_url), None),
+            (factory.post(self.detail_url), None),
+        )
+        for request, expected_db in cases:
+            with self.subTest(method=request.method, path=request.path):
+                self.assertEqual(self.route(request), expected_db)
+
+    def test_reads_after_write_stay_on_primary(self):
+        response = self.author_client.post(
+            self.edit_url, dict(self.data, slug=self.note.slug)
+        )
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        request = RequestFactory().get(URLS["notes_list"])
+        request.COOKIES[STICKY_COOKIE] = "1"
+        self.assertIsNone(self.route(request))
+
+
+class TestSessionWrites(BaseTestCase):
+
+    def test_unchanged_session_is_not_saved(self):
+        """Присваивание прежнего значения не пересохраняет сессию."""
+        for engine, (value, saved) in product(
+            settings.SESSION_ENGINES.values(),
+            (("dark", False), ("light", True)),
+        ):
+            with self.subTest(engine=engine, value=value), \
+                    self.settings(SESSION_ENGINE=engine):
+                session = import_module(engine).SessionStore()
+                session["theme"] = "dark"
+                session.save()
+
+                def view(request):
+                    request.session["theme"] = value
+                    return HttpResponse()
+
+                request = RequestFactory().get(URLS["notes_home"])
+                request.COOKIES[settings.SESSION_COOKIE_NAME] = (
+                    session.session_key
+                )
+                response = SessionMiddleware(view)(request)
+                self.assertEqual(
+                    settings.SESSION_COOKIE_NAME in response.cookies, saved
+                )
+
+
+class TestUserCache(BaseTestCase):
+
+    def test_user_lookup_cached_until_saved(self):
+        """Пользователь читается из кэша, пока его не сохранят."""
+        self.author_client.get(URLS["notes_list"])
+        with CaptureQueriesContext(connection) as context:
+            self.author_client.get(URLS["notes_list"])
+        self.assertFalse(any(
+            '"auth_user"' in query["sql"] for query in context.captured_queries
+        ))
+        key = USER_KEY.format(pk=self.author.pk)
+        self.assertIsNotNone(user_cache().get(key))
+        self.author.first_name = "Автор"
+        self.author.save()
+        self.assertIsNone(user_cache().get(key))
+        response = self.author_client.get(URLS["notes_list"])
+        self.assertEqual(response.context["user"].first_name, "Автор")
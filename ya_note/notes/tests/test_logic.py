@@ -1,8 +1,13 @@
+import json
+from unittest import mock
+
 from notes.forms import WARNING
 from notes.models import Note
+from notes.seed import seed_notes
+from notes.slugs import allocate_slugs
 from pytils.translit import slugify
 
-from .common import URLS, BaseTestCase
+from .common import URLS, BaseTestCase, User
 
 
 class TestRoutes(BaseTestCase):
@@ -57,6 +62,32 @@ class TestRoutes(BaseTestCase):
         expected_slug = slugify(data_without_slug["title"])
         self.assertEqual(new_note.slug, expected_slug)
 
+    def test_empty_slug_gets_next_free_suffix(self):
+        """
+        Если slug по заголовку занят, к нему добавляется
+        следующий свободный номер, а форма не отклоняется.
+        """
+        data_without_slug = {"title": self.note.title, "text": "Текст"}
+        for expected_suffix in ("-2", "-3"):
+            with self.subTest(suffix=expected_suffix):
+                response = self.author_client.post(URLS["notes_add"],
+                                                   data=data_without_slug)
+                self.assertRedirects(response, URLS["notes_success"])
+                self.assertTrue(Note.objects.filter(
+                    slug=self.note.slug + expected_suffix
+                ).exists())
+
+    def test_allocate_slugs_uses_one_query(self):
+        """Подбор slug для пачки заголовков делает один запрос."""
+        titles = [self.note.title, self.note.title, "Другая заметка"]
+        with self.assertNumQueries(1):
+            slugs = allocate_slugs(Note.objects.all(), titles, 100)
+        self.assertEqual(slugs, [
+            self.note.slug + "-2",
+            self.note.slug + "-3",
+            slugify("Другая заметка"),
+        ])
+
     def test_author_can_delete_note(self):
         """Пользователь может удалять свои заметки."""
         expected_note_count = Note.objects.count()
@@ -72,3 +103,111 @@ class TestRoutes(BaseTestCase):
         self.assertRedirects(response, URLS["notes_success"])
         self.note.refresh_from_db()
         self.assertEqual(self.note.title, self.data["title"])
+
+    def test_author_can_export_notes(self):
+        """Заметки выгружаются потоком в формате JSON Lines."""
+        response = self.author_client.get(URLS["notes_export"])
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{
+            "title": self.note.title,
+            "text": self.note.text,
+            "slug": self.note.slug,
+        }])
+        response = self.not_author_client.get(URLS["notes_export"])
+        self.assertEqual(b"".join(response.streaming_content), b"")
+
+    def test_author_can_import_notes(self):
+        """
+        Заметки загружаются из JSON Lines, занятые и пустые slug
+        заменяются свободными.
+        """
+        lines = [
+            {"title": "Импорт", "text": "Текст", "slug": self.note.slug},
+            {"title": "Импорт", "text": "Текст"},
+            {"title": "Импорт", "text": "Текст"},
+        ]
+        body = "\n".join(
+            json.dumps(line, ensure_ascii=False) for line in lines
+        )
+        response = self.not_author_client.post(
+            URLS["notes_import"], body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.json(), {"created": 3})
+        self.assertEqual(
+            set(Note.objects.filter(author=self.not_author).values_list(
+                "slug", flat=True
+            )),
+            {self.note.slug + "-2", "import", "import-2"},
+        )
+
+    def test_import_is_atomic(self):
+        """Ошибка в любой строке отменяет весь импорт."""
+        expected_note_count = Note.objects.count()
+        body = '{"title": "Импорт", "text": "Текст"}\nне json\n'
+        response = self.author_client.post(
+            URLS["notes_import"], body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Note.objects.count(), expected_note_count)
+
+    def test_import_keeps_free_explicit_slug(self):
+        """Свободный slug из файла сохраняется без изменений."""
+        body = '{"title": "Импорт", "text": "Текст", "slug": "My_Slug"}'
+        response = self.author_client.post(
+            URLS["notes_import"], body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Note.objects.filter(slug="My_Slug").exists())
+
+    def test_import_validates_notes(self):
+        """Заметка, которую не пропустила бы модель, не импортируется."""
+        expected_note_count = Note.objects.count()
+        for line in (
+            {"title": "", "text": "Текст"},
+            {"title": "З" * 101, "text": "Текст"},
+            {"title": "Импорт", "text": ""},
+            {"title": "Импорт", "text": "Текст", "slug": "не slug"},
+            {"title": "Импорт", "text": "Текст", "slug": "s" * 101},
+        ):
+            with self.subTest(line=line):
+                body = '{"title": "Импорт", "text": "Текст"}\n' + json.dumps(
+                    line, ensure_ascii=False
+                )
+                response = self.author_client.post(
+                    URLS["notes_import"], body,
+                    content_type="application/x-ndjson",
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("строке 2", response.json()["error"])
+                self.assertEqual(Note.objects.count(), expected_note_count)
+
+    def test_import_reports_slug_taken_concurrently(self):
+        """Slug, занятый параллельным запросом, отклоняет строку."""
+        expected_note_count = Note.objects.count()
+        body = '{"title": "Импорт", "text": "Текст"}'
+        with mock.patch(
+            "notes.bulk.allocate_slugs", return_value=[self.note.slug]
+        ):
+            response = self.author_client.post(
+                URLS["notes_import"], body,
+                content_type="application/x-ndjson",
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("строке 1", response.json()["error"])
+        self.assertEqual(Note.objects.count(), expected_note_count)
+
+    def test_seed_is_repeatable(self):
+        """Одинаковый seed даёт одинаковые заметки, авторы не дублируются."""
+        def contents(authors):
+            return list(Note.objects.filter(
+                author__in=authors
+            ).order_by("pk").values_list("title", "text")[:20])
+
+        first = contents(seed_notes(20, 3, seed=1))
+        Note.objects.filter(author__username__startswith="seed-").delete()
+        second = contents(seed_notes(20, 3, seed=1))
+        self.assertEqual(first, second)
+        self.assertEqual(len(second), 20)
+        self.assertEqual(
+            User.objects.filter(username__startswith="seed-").count(), 3
+        )
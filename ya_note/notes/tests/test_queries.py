@@ -0,0 +1,123 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from notes import urls
+from notes.management.commands.bench_urls import note_pages
+from notes.models import Note
+from yacommon.benchmarks import Page, make_client, measure_page, uncovered
+from yacommon.query_budget import QueryBudgetExceeded
+from yacommon.testing import query_plan_problems
+
+from .common import URLS, BaseTestCase
+
+
+class TestQueries(BaseTestCase):
+
+    def test_query_count(self):
+        """
+        Количество запросов к базе для каждой страницы зафиксировано.
+
+        Пользователь прочитан из базы до замеров и берётся из кэша,
+        см. CachedModelBackend. Сессии в тестах тоже хранятся в кэше,
+        см. FAST_LOGIN_SETTINGS, с сессиями в базе добавится ещё один
+        запрос.
+        """
+        self.author_client.get(URLS["notes_home"])
+        edit_data = dict(self.data, slug=self.note.slug)
+        query_budgets = (
+            (self.client, "get", URLS["notes_home"], None, 0),
+            (self.client, "get", URLS["users_login"], None, 0),
+            (self.client, "get", URLS["users_signup"], None, 0),
+            (self.author_client, "get", URLS["notes_home"], None, 0),
+            (self.author_client, "get", URLS["notes_list"], None, 2),
+            (self.author_client, "get", URLS["notes_search"],
+             {"q": "текст"}, 2),
+            (self.author_client, "get", URLS["notes_success"], None, 0),
+            (self.author_client, "get", self.detail_url, None, 1),
+            (self.author_client, "get", self.add_url, None, 0),
+            (self.author_client, "post", self.add_url, self.data, 2),
+            (self.author_client, "get", self.edit_url, None, 1),
+            (self.author_client, "post", self.edit_url, edit_data, 3),
+            (self.author_client, "get", self.delete_url, None, 1),
+            (self.author_client, "post", self.delete_url, None, 2),
+        )
+        for client, method, url, data, expected_queries in query_budgets:
+            with self.subTest(method=method, url=url):
+                with self.assertNumQueries(expected_queries):
+                    getattr(client, method)(url, data)
+
+    def test_export_query_count(self):
+        """Выгрузка читает заметки одним запросом при любом их числе."""
+        with self.assertNumQueries(2):
+            response = self.author_client.get(URLS["notes_export"])
+            b"".join(response.streaming_content)
+
+    def test_import_query_count(self):
+        """
+        Импорт пачки заметок не делает запросов на каждую заметку.
+
+        Вставка пачки идёт в точке сохранения, её создание
+        и освобождение входят в счёт.
+        """
+        body = "\n".join(
+            f'{{"title": "Заметка {index}", "text": "Текст"}}'
+            for index in range(10)
+        )
+        with self.assertNumQueries(7):
+            self.author_client.post(
+                URLS["notes_import"], body,
+                content_type="application/x-ndjson",
+            )
+
+    def test_queries_use_indexes(self):
+        """Запросы страниц не обходят таблицы и не сортируют без индекса."""
+        requests = (
+            ("get", URLS["notes_list"], None),
+            ("get", URLS["notes_search"], {"q": "текст"}),
+            ("get", self.detail_url, None),
+            ("post", self.add_url, self.data),
+            ("post", self.add_url, dict(self.data, slug="")),
+            ("post", self.edit_url, dict(self.data, slug=self.note.slug)),
+            ("get", URLS["notes_export"], None),
+            ("post", self.delete_url, None),
+        )
+        with CaptureQueriesContext(connection) as context:
+            for method, url, data in requests:
+                response = getattr(self.author_client, method)(url, data)
+                b"".join(getattr(response, "streaming_content", ()))
+        self.assertEqual(query_plan_problems(context.captured_queries), {})
+
+    @override_settings(QUERY_BUDGETS={"notes:list": 1})
+    def test_over_budget_raises(self):
+        """Страница сверх бюджета запросов роняет запрос в тестах."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.author_client.get(URLS["notes_list"])
+
+    @override_settings(NOTES_IMPORT_BATCH_SIZE=1)
+    def test_import_not_failed_by_repeated_reads(self):
+        """Чтение slug на каждую пачку импорта не считается N+1."""
+        body = "\n".join(
+            f'{{"title": "Заметка {index}", "text": "Текст"}}'
+            for index in range(10)
+        )
+        response = self.author_client.post(
+            URLS["notes_import"], body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.json(), {"created": 10})
+
+    def test_bench_measures_every_page(self):
+        """Команда bench_urls замеряет каждую страницу приложения."""
+        self.assertEqual(
+            uncovered(urls.urlpatterns, urls.app_name, note_pages("slug")), []
+        )
+
+    def test_measure_page_rolls_back_writes(self):
+        """Замер пишущей страницы считает её запросы и не оставляет данных."""
+        expected_note_count = Note.objects.count()
+        metrics = measure_page(
+            make_client(self.author), Page("post", self.add_url, self.data),
+            repeat=2,
+        )
+        self.assertEqual((metrics["status"], metrics["queries"]), (302, 2))
+        self.assertEqual(Note.objects.count(), expected_note_count)
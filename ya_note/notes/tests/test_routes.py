@@ -19,6 +19,7 @@ class TestRoutes(BaseTestCase):
         )
         self.auth_user_urls = (
             self.notes_list_url,
+            URLS["notes_search"],
             self.add_url,
             self.success_url,
         )
@@ -67,8 +68,11 @@ class TestRoutes(BaseTestCase):
         note_slug = self.note.slug
         urls = [
             URLS["notes_list"],
+            URLS["notes_search"],
             URLS["notes_success"],
             URLS["notes_add"],
+            URLS["notes_export"],
+            URLS["notes_import"],
             URLS["notes_detail"](note_slug),
             URLS["notes_edit"](note_slug),
             URLS["notes_delete"](note_slug),
@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
+from .bulk import InvalidLine, export_lines, import_lines
+from .cache import get_list_version, invalidate_list
 from .forms import NoteForm
 from .models import Note
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -25,6 +30,10 @@ class NoteBase(LoginRequiredMixin):
         """Пользователь может работать только со своими заметками."""
         return self.model.objects.filter(author=self.request.user)
 
+    def invalidate_list(self):
+        """Список заметок пользователя изменился."""
+        invalidate_list(self.request.user.pk)
+
 
 class NoteCreate(NoteBase, generic.CreateView):
     """Добавление заметки."""
@@ -32,10 +41,10 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
-        return super().form_valid(form)
+        form.instance.author = self.request.user
+        response = super().form_valid(form)
+        self.invalidate_list()
+        return response
 
 
 class NoteUpdate(NoteBase, generic.UpdateView):
@@ -43,17 +52,92 @@ class NoteUpdate(NoteBase, generic.UpdateView):
     template_name = 'notes/form.html'
     form_class = NoteForm
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        self.invalidate_list()
+        return response
+
 
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
 
+    def delete(self, request, *args, **kwargs):
+        response = super().delete(request, *args, **kwargs)
+        self.invalidate_list()
+        return response
+
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список всех заметок пользователя.
+
+    Выводится постранично, из базы читаются только показываемые поля,
+    а сама страница списка кэшируется до изменения заметок автора.
+    """
     template_name = 'notes/list.html'
 
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_PER_PAGE
+
+    def get_queryset(self):
+        return super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['cache_alias'] = settings.NOTES_LIST_CACHE_ALIAS
+        context['cache_timeout'] = settings.NOTES_LIST_CACHE_TIMEOUT
+        context['cache_version'] = get_list_version(self.request.user.pk)
+        return context
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_PER_PAGE
+
+    def get_queryset(self):
+        return search_notes(self.request.user, self.request.GET.get('q', ''))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NotesExport(NoteBase, generic.View):
+    """Выгрузка всех заметок пользователя в формате JSON Lines."""
+
+    def get(self, request, *args, **kwargs):
+        response = StreamingHttpResponse(
+            export_lines(
+                self.get_queryset().order_by('id'),
+                settings.NOTES_EXPORT_CHUNK_SIZE,
+            ),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'attachment; filename="notes.jsonl"'
+        return response
+
+
+class NotesImport(NoteBase, generic.View):
+    """Загрузка заметок из тела запроса в формате JSON Lines."""
+
+    def post(self, request, *args, **kwargs):
+        try:
+            created = import_lines(
+                request, request.user, settings.NOTES_IMPORT_BATCH_SIZE
+            )
+        except InvalidLine as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        self.invalidate_list()
+        return JsonResponse({'created': created}, status=201)
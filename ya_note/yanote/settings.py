@@ -1,9 +1,16 @@
+import os
+import sys
+import tempfile
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий для yanews и yanote код лежит в пакете yacommon в корне
+# репозитория.
+sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-yipnj$#j!ajarq%k55z4kuf3x79)91h0h42o9!1ho(z=!%mt=#'
 
 DEBUG = False
@@ -23,10 +30,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'yacommon.query_budget.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yacommon.routers.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -52,13 +61,100 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
-DATABASES = {
+DATABASE_PROFILES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    # WAL, synchronous=NORMAL, mmap, busy_timeout, BEGIN IMMEDIATE
+    # и постоянные соединения для конкурентной записи.
+    'tuned': {
+        'ENGINE': 'yacommon.sqlite_backend',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+    },
+}
+
+DATABASES = {
+    'default': {
+        **DATABASE_PROFILES[os.environ.get('YANOTE_DB_PROFILE', 'default')],
+        # Файл тестовой базы, по умолчанию она в памяти. Параллельный
+        # прогон даёт каждому процессу копию мигрированного шаблона.
+        'TEST': {'NAME': os.environ.get('YANOTE_TEST_DB')},
+    },
+}
+
+# Реплики только для чтения — пути к файлам SQLite через запятую.
+# Локально их заменяют копии основной базы, см. sync_replicas.
+for index, replica_name in enumerate(
+        filter(None, os.environ.get('YANOTE_REPLICAS', '').split(','))
+):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'NAME': replica_name,
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['yacommon.routers.ReplicaRouter']
+
+REPLICA_READ_VIEWS = ('notes:list', 'notes:detail')
+
+REPLICA_STICKY_SECONDS = 15
+
+# Анонимным пользователям заметки не показываются, ограничивать нечего.
+REPLICA_ANONYMOUS_READS = True
+
+SESSION_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'notes-sessions',
+    },
+    # Общий для нескольких процессов сервера на одной машине.
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'yanote-sessions',
+    },
 }
 
+# Данные, которые должны совпадать во всех процессах сервера: запись
+# в одном процессе сразу видна остальным. locmem годится только для
+# сервера из одного процесса.
+SHARED_CACHE_BACKENDS = {
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'yanote-shared',
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'notes-shared',
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': SESSION_CACHE_BACKENDS[os.environ.get('YANOTE_SESSION_CACHE', 'locmem')],
+    'shared': SHARED_CACHE_BACKENDS[os.environ.get('YANOTE_SHARED_CACHE', 'file')],
+}
+
+# Хранилище сессий: db читает django_session в каждом запросе
+# авторизованного пользователя, cached_db сначала смотрит в кэш
+# sessions, signed_cookies держит сессию в подписанной cookie и не
+# обращается к серверу.
+# Неизменённая сессия не пересохраняется, см. yacommon.sessions.
+SESSION_ENGINES = {
+    'db': 'yacommon.sessions.db',
+    'cached_db': 'yacommon.sessions.cached_db',
+    'signed_cookies': 'yacommon.sessions.signed_cookies',
+}
+
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('YANOTE_SESSIONS', 'db')]
+
+SESSION_CACHE_ALIAS = 'sessions'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -85,5 +181,45 @@ STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+AUTHENTICATION_BACKENDS = ['yacommon.auth.CachedModelBackend']
+
+# Пользователи кэшируются в общем кэше: смена пароля или блокировка
+# сразу видна всем процессам сервера.
+AUTH_USER_CACHE_ALIAS = 'shared'
+
+AUTH_USER_CACHE_TIMEOUT = 60
+
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_PER_PAGE = 50
+
+# Версия списка и его фрагменты лежат в общем кэше: изменение заметок
+# в одном процессе сразу видно остальным.
+NOTES_LIST_CACHE_ALIAS = 'shared'
+
+NOTES_LIST_CACHE_TIMEOUT = 60 * 60
+
+NOTES_IMPORT_BATCH_SIZE = 500
+
+NOTES_EXPORT_CHUNK_SIZE = 2000
+
+# Наибольшее число SQL-запросов на страницу по имени URL.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 4,
+    'notes:search': 4,
+    'notes:success': 2,
+    'notes:detail': 3,
+    'notes:add': 6,
+    'notes:edit': 5,
+    'notes:delete': 4,
+}
+
+QUERY_BUDGET_RAISE = DEBUG
+
+QUERY_BUDGET_N_PLUS_ONE_THRESHOLD = 5
+
+# Страницы, где повторы одного чтения ожидаемы: импорт читает
+# занятые slug для каждой пачки заметок.
+QUERY_BUDGET_N_PLUS_ONE_EXEMPT = ('notes:import',)
@@ -0,0 +1,46 @@
+"""
+Кэш пользователей для AuthenticationMiddleware.
+
+Каждый запрос авторизованного пользователя читает его строку из
+auth_user по id из сессии. CachedModelBackend берёт пользователя из
+общего для всех процессов кэша AUTH_USER_CACHE_ALIAS и обращается
+к базе только при промахе. Запись живёт AUTH_USER_CACHE_TIMEOUT секунд
+и удаляется при сохранении или удалении пользователя через сигналы
+приложения. Изменения через QuerySet.update сигналов не шлют, их
+устаревание ограничено тем же сроком.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+
+USER_KEY = 'auth:user:{pk}'
+
+
+def user_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def invalidate_user(user_id):
+    """
+    Удаляет пользователя из кэша сразу и ещё раз после фиксации.
+
+    Запрос, который до фиксации успеет закэшировать старую строку,
+    будет перезаписан повторным удалением из on_commit.
+    """
+    key = USER_KEY.format(pk=user_id)
+    user_cache().delete(key)
+    transaction.on_commit(lambda: user_cache().delete(key))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который находит пользователя по id через кэш."""
+
+    def get_user(self, user_id):
+        key = USER_KEY.format(pk=user_id)
+        user = user_cache().get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache().set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
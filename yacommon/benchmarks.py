@@ -0,0 +1,150 @@
+"""
+Замеры страниц для команд bench_urls.
+
+Страница описывается как Page: метод, адрес, данные и нужна ли
+авторизация. measure_page прогоняет её тестовым клиентом и возвращает
+медиану и p99 задержки, число запросов к базе и пик выделенной памяти
+по tracemalloc. Пишущие запросы выполняются в транзакции, которая
+откатывается, поэтому замер не меняет данные между повторами.
+Результаты прогона сохраняются в JSON, а compare_results сопоставляет
+их с прошлым прогоном.
+"""
+import json
+import platform
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from statistics import median, quantiles
+from time import perf_counter
+
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+# Имя хоста из ALLOWED_HOSTS: тестовый клиент по умолчанию шлёт testserver.
+SERVER_NAME = 'localhost'
+METRICS = ('p50_ms', 'p99_ms', 'queries', 'peak_kb')
+# Не считаются: их добавляет и транзакция самого замера.
+TRANSACTION_STATEMENTS = (
+    'BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT',
+)
+
+Page = namedtuple(
+    'Page', ('method', 'url', 'data', 'authorized', 'extra'),
+    defaults=(None, True, {}),
+)
+
+
+def make_client(user=None):
+    client = Client(SERVER_NAME=SERVER_NAME)
+    if user is not None:
+        client.force_login(user)
+    return client
+
+
+def uncovered(urlpatterns, app_name, pages):
+    """Имена страниц приложения, для которых нет замера."""
+    return sorted(
+        {f'{app_name}:{pattern.name}' for pattern in urlpatterns} - set(pages)
+    )
+
+
+@contextmanager
+def rolled_back(enabled):
+    if not enabled:
+        yield
+        return
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def send(client, page):
+    with rolled_back(page.method != 'get'):
+        response = getattr(client, page.method)(
+            page.url, page.data, **page.extra
+        )
+        # Потоковый ответ формируется только при чтении.
+        b''.join(getattr(response, 'streaming_content', ()))
+    return response
+
+
+def measure_page(client, page, repeat):
+    """
+    Метрики одной страницы.
+
+    Первый запрос прогревает кэши и в замер не входит; запросы к данным
+    считаются по второму, память — по отдельному запросу под tracemalloc,
+    чтобы трассировка не искажала задержку.
+    """
+    send(client, page)
+    # Журнал запросов очищается сигналом request_started в начале
+    # каждого запроса, поэтому он сбрасывается и до замера, а число
+    # запросов читается сразу после него.
+    reset_queries()
+    with CaptureQueriesContext(connection) as context:
+        response = send(client, page)
+    queries = sum(
+        not query['sql'].startswith(TRANSACTION_STATEMENTS)
+        for query in context.captured_queries
+    )
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        send(client, page)
+        timings.append((perf_counter() - started) * 1000)
+    tracemalloc.start()
+    try:
+        send(client, page)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        'p50_ms': round(median(timings), 3),
+        'p99_ms': round(
+            quantiles(timings, n=100)[98] if len(timings) > 1
+            else timings[0], 3
+        ),
+        'queries': queries,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def make_results(project, sizes):
+    return {
+        'project': project,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sizes': sizes,
+    }
+
+
+def write_results(path, results):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+def read_results(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare_results(previous, current):
+    """
+    Строки сравнения двух прогонов: размер, страница, метрика,
+    прошлое и новое значения и их отношение.
+
+    Сравниваются только размеры и страницы, которые есть в обоих.
+    """
+    for size, pages in current['sizes'].items():
+        for name, metrics in pages.items():
+            old = previous['sizes'].get(size, {}).get(name)
+            if old is None:
+                continue
+            for metric in METRICS:
+                ratio = (
+                    metrics[metric] / old[metric] if old[metric] else None
+                )
+                yield size, name, metric, old[metric], metrics[metric], ratio
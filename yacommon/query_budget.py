@@ -0,0 +1,209 @@
+"""
+Учёт SQL-запросов по страницам.
+
+Middleware считает запросы и время работы с базой для каждого запроса,
+сверяет их с бюджетом из QUERY_BUDGETS, ищет повторяющиеся похожие
+запросы (признак N+1) и копит гистограммы времени ответа по страницам.
+Исключение QueryBudgetExceeded бросается только для страниц с бюджетом
+и только если запрос ничего не записал: изменения к этому моменту уже
+зафиксированы, и ошибка 500 скрыла бы их от клиента. В остальных
+случаях нарушение пишется в лог.
+Запросы перехватывает обёртка execute_wrapper на каждом соединении,
+а счётчик текущего запроса берётся из contextvar, поэтому учёт
+не зависит от DEBUG и одинаково работает под WSGI, ASGI и в тестах:
+запросы из sync_to_async попадают в счёт своего HTTP-запроса.
+"""
+import asyncio
+import logging
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+SQL_LITERALS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\bIN \([^)]*\)', re.IGNORECASE), 'IN (...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+class QueryBudgetExceeded(Exception):
+    """Страница сделала больше запросов, чем ей положено."""
+
+
+def normalize_sql(sql):
+    """Убирает из запроса значения, чтобы сравнивать похожие запросы."""
+    for pattern, replacement in SQL_LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class QueryRecorder:
+    """Обёртка выполнения запросов: число, время и повторы."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.wrote = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - started
+            self.count += 1
+            self.statements[normalize_sql(sql)] += 1
+            if sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+                self.wrote = True
+
+    def repeated(self, threshold):
+        """Одинаковые чтения, повторённые не меньше threshold раз."""
+        return [
+            (sql, count) for sql, count in self.statements.items()
+            if count >= threshold and sql.upper().startswith('SELECT')
+        ]
+
+
+class TimingHistograms:
+    """Гистограммы времени ответа по имени страницы в пределах процесса."""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS_MS):
+        self.buckets = buckets
+        self._lock = Lock()
+        self._counts = defaultdict(lambda: [0] * (len(buckets) + 1))
+
+    def record(self, view_name, duration_ms):
+        with self._lock:
+            self._counts[view_name][
+                bisect_left(self.buckets, duration_ms)
+            ] += 1
+
+    def snapshot(self):
+        labels = [f'<={bucket}' for bucket in self.buckets] + [
+            f'>{self.buckets[-1]}'
+        ]
+        with self._lock:
+            return {
+                view_name: dict(zip(labels, counts))
+                for view_name, counts in self._counts.items()
+            }
+
+
+histograms = TimingHistograms()
+
+current_recorder = ContextVar('query_budget_recorder', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Передаёт запрос счётчику текущего HTTP-запроса, если он есть."""
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_wrapper)
+
+
+class QueryBudgetMiddleware:
+    """Проверяет бюджет запросов и добавляет заголовок Server-Timing."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Соединения, открытые до загрузки middleware, сигнал пропустил.
+        for connection in connections.all():
+            install_wrapper(connection)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder, started = QueryRecorder(), perf_counter()
+        token = current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder, started = QueryRecorder(), perf_counter()
+        token = current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    def finish(self, request, response, recorder, started):
+        elapsed_ms = (perf_counter() - started) * 1000
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        if view_name:
+            histograms.record(view_name, elapsed_ms)
+        response['Server-Timing'] = (
+            f'db;dur={recorder.duration * 1000:.1f};'
+            f'desc="{recorder.count} queries", app;dur={elapsed_ms:.1f}'
+        )
+        self.check(request, view_name, recorder)
+        return response
+
+    def check(self, request, view_name, recorder):
+        problems = []
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is not None and recorder.count > budget:
+            problems.append(
+                f'{view_name}: {recorder.count} запросов '
+                f'при бюджете {budget}'
+            )
+        if view_name not in settings.QUERY_BUDGET_N_PLUS_ONE_EXEMPT:
+            for sql, count in recorder.repeated(
+                    settings.QUERY_BUDGET_N_PLUS_ONE_THRESHOLD
+            ):
+                problems.append(
+                    f'{view_name}: похоже на N+1, {count} раз: {sql}'
+                )
+        if not problems:
+            return
+        if (settings.QUERY_BUDGET_RAISE
+                and budget is not None
+                and request.method in SAFE_METHODS
+                and not recorder.wrote):
+            raise QueryBudgetExceeded('; '.join(problems))
+        for problem in problems:
+            logger.warning(problem)
+
+
+@staff_member_required
+def query_stats(request):
+    """Гистограммы времени ответа по страницам текущего процесса."""
+    return JsonResponse(histograms.snapshot(), json_dumps_params={
+        'ensure_ascii': False
+    })
@@ -0,0 +1,107 @@
+"""
+Чтение с реплик для страниц, которые только читают данные.
+
+ReplicaMiddleware по имени URL решает, может ли запрос читать с реплики:
+страница должна быть в REPLICA_READ_VIEWS, метод — безопасным, а
+пользователь не должен был ничего записывать последние
+REPLICA_STICKY_SECONDS секунд. Решение хранится в contextvar, и пока оно
+действует, ReplicaRouter отправляет чтения на одну из DATABASE_REPLICAS.
+Записи и все остальные запросы идут в default.
+
+После успешной записи ставится cookie, и следующие чтения этого
+пользователя тоже идут в default: свою запись он видит сразу,
+даже если реплика отстаёт. Анонимные запросы читают с реплики, только
+если включён REPLICA_ANONYMOUS_READS: проект, который кэширует
+страницы анонимов, оставляет их на основной базе, чтобы отставание
+реплики не задержалось в кэше до следующего изменения данных.
+"""
+import asyncio
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+
+STICKY_COOKIE = 'use_primary'
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class RoutingState:
+    use_replica = False
+
+
+routing_state = ContextVar('replica_routing_state', default=None)
+
+
+class ReplicaRouter:
+    """Чтения отмеченных страниц — с реплик, остальное — в default."""
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if state is not None and state.use_replica:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """На репликах те же данные, что и в основной базе."""
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Схема реплик приходит вместе с данными из основной базы."""
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """Выбирает базу для чтения и закрепляет пишущего за основной базой."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = routing_state.set(RoutingState())
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.stick_after_write(request, response)
+
+    async def __acall__(self, request):
+        token = routing_state.set(RoutingState())
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.stick_after_write(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Состояние меняется на месте: process_view под ASGI выполняется
+        # в другом потоке с копией контекста.
+        routing_state.get().use_replica = (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and request.resolver_match.view_name
+            in settings.REPLICA_READ_VIEWS
+            and STICKY_COOKIE not in request.COOKIES
+            and (settings.REPLICA_ANONYMOUS_READS
+                 or request.user.is_authenticated)
+        )
+
+    def stick_after_write(self, request, response):
+        if (settings.DATABASE_REPLICAS
+                and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
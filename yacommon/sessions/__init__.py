@@ -0,0 +1,11 @@
+"""
+Хранилища сессий, которые не сохраняют неизменённые данные.
+
+SessionMiddleware сохраняет сессию, помеченную изменённой, а пометку
+ставит любое присваивание, даже того же значения. Для сессий в базе
+это лишняя запись, для signed_cookies — новая cookie в каждом ответе.
+Хранилища пакета запоминают хэш данных при загрузке сессии и считают
+её изменённой, только если данные или ключ стали другими.
+Подключаются через SESSION_ENGINE = 'yacommon.sessions.db',
+'yacommon.sessions.cached_db' или 'yacommon.sessions.signed_cookies'.
+"""
@@ -0,0 +1,36 @@
+from hashlib import sha256
+
+from django.conf import settings
+
+
+class UnchangedSessionMixin:
+    """Не сохраняет сессию, данные и ключ которой прежние."""
+    loaded_state = None
+
+    def state(self, data):
+        return self.session_key, sha256(self.serializer().dumps(data)).digest()
+
+    def load(self):
+        data = super().load()
+        self.loaded_state = self.state(data)
+        return data
+
+    def is_unchanged(self):
+        """Ключ и хэш данных те же, что при загрузке сессии."""
+        return (self.loaded_state is not None
+                and self.state(dict(self.items())) == self.loaded_state)
+
+    @property
+    def modified(self):
+        # SessionMiddleware сохраняет сессию и ставит cookie по этому флагу.
+        return self._modified and not self.is_unchanged()
+
+    @modified.setter
+    def modified(self, value):
+        self._modified = value
+
+    def save(self, must_create=False):
+        if (must_create
+                or settings.SESSION_SAVE_EVERY_REQUEST
+                or not self.is_unchanged()):
+            super().save(must_create)
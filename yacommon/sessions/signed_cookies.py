@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import signed_cookies
+
+from .base import UnchangedSessionMixin
+
+
+class SessionStore(UnchangedSessionMixin, signed_cookies.SessionStore):
+    pass
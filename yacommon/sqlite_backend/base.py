@@ -0,0 +1,33 @@
+"""
+SQLite, настроенный на конкурентную запись.
+
+Подключается через ENGINE = 'yacommon.sqlite_backend'. Каждое новое
+соединение получает PRAGMA из PRAGMAS: журнал WAL, synchronous=NORMAL,
+отображение файла в память и ожидание занятой базы. Транзакции
+открываются как BEGIN IMMEDIATE: блокировка записи берётся сразу
+и ждёт busy_timeout, а не обрывается ошибкой «database is locked»
+при попытке повысить блокировку чтения посреди транзакции.
+Значения меняются ключами PRAGMAS и TRANSACTION_MODE в DATABASES.
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = {**PRAGMAS, **self.settings_dict.get('PRAGMAS', {})}
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict.get('TRANSACTION_MODE', 'IMMEDIATE')
+        self.cursor().execute(f'BEGIN {mode}')
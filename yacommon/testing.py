@@ -0,0 +1,93 @@
+"""Помощники тестов, общие для ya_news и ya_note."""
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY)
+from django.db import connection
+
+SESSIONS_CACHE = 'sessions'
+SHARED_CACHE = 'shared'
+# Вход в тестовых клиентах без записей в базу: быстрый хэш паролей
+# и сессии в кэше процесса, который не очищается между тестами.
+# Файловые кэши делили бы между собой параллельные прогоны, поэтому
+# все кэши, кроме default, тоже живут в памяти процесса.
+FAST_LOGIN_SETTINGS = dict(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    SESSION_ENGINE='django.contrib.sessions.backends.cache',
+    SESSION_CACHE_ALIAS=SESSIONS_CACHE,
+    CACHES={
+        **settings.CACHES,
+        **{
+            alias: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': f'test-{alias}',
+            }
+            for alias in (*settings.CACHES, SESSIONS_CACHE)
+            if alias != 'default'
+        },
+    },
+)
+# Ключи готовых сессий по id пользователя и хэшу его пароля.
+LOGIN_SESSIONS = {}
+
+
+def fast_login(client, user):
+    """
+    Авторизует клиент без force_login.
+
+    Сессия пользователя создаётся при первом входе и переживает тест:
+    следующие входы только ставят cookie, без записи сессии и сигнала
+    user_logged_in. Тесты начинают с одной и той же базы, поэтому
+    пользователи обычно получают одни и те же id, и сессия подходит
+    следующим тестам.
+    """
+    engine = import_module(settings.SESSION_ENGINE)
+    auth_hash = user.get_session_auth_hash()
+    key = LOGIN_SESSIONS.get((user.pk, auth_hash))
+    if key is None or not engine.SessionStore().exists(key):
+        session = engine.SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = auth_hash
+        session.save()
+        key = LOGIN_SESSIONS[user.pk, auth_hash] = session.session_key
+    client.cookies[settings.SESSION_COOKIE_NAME] = key
+    return client
+
+
+def query_plan_problems(captured_queries):
+    """
+    Чтения, план которых обходит таблицу целиком или сортирует
+    строки во временном B-дереве.
+
+    Обход индекса допустим вместе с LIMIT: он останавливается после
+    первых строк. Сортировка допустима, если строки найдены по
+    первичному ключу. Полнотекстовый поиск пропускается: выдача
+    по релевантности сортируется всегда.
+    """
+    problems = {}
+    with connection.cursor() as cursor:
+        for query in captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or '_fts' in sql:
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            details = [row[-1] for row in cursor.fetchall()]
+            lookups = [
+                detail for detail in details
+                if detail.startswith(('SCAN', 'SEARCH'))
+            ]
+            found = [
+                detail for detail in lookups
+                if detail.startswith('SCAN')
+                and not ('INDEX' in detail and ' LIMIT ' in sql)
+            ]
+            if any(detail.startswith('USE TEMP B-TREE')
+                   for detail in details) and not all(
+                'USING INTEGER PRIMARY KEY' in detail for detail in lookups
+            ):
+                found.append('USE TEMP B-TREE')
+            if found:
+                problems[sql] = found
+    return problems